@@ -1,40 +1,210 @@
-from sklearn.tree import DecisionTreeClassifier
+from array import array
+from collections import OrderedDict
+import hashlib
+import json
+import os
 import numpy as np
 
+# Bump when the artifact layout changes so stale files are never read
+MODEL_FORMAT_VERSION = 1
+
+# Everything that affects training; its hash names the artifact on disk
+TRAINING_CONFIG = {
+    'mass_range': (8, 50),  # Stars from 8 to 50 solar masses
+    'metallicity_range': (0.005, 0.02),  # Typical metallicity ranges
+    'samples': 100,
+    'black_hole_mass': 25,  # Stars above ~25 solar masses typically form black holes
+    'seed': 42,
+    'random_state': 42
+}
+
+# Flat decision table: one record per tree node, children -1 at leaves
+NODE_DTYPE = np.dtype([
+    ('feature', np.int32),
+    ('threshold', np.float64),
+    ('left', np.int32),
+    ('right', np.int32),
+    ('proba', np.float64, (2,))
+])
+
+# Outcome codes returned by the batch API
+NEUTRON_STAR = 0
+BLACK_HOLE = 1
+WHITE_DWARF = 2
+OUTCOME_NAMES = ("Neutron Star", "Black Hole", "White Dwarf")
+WHITE_DWARF_MASS = 8  # Stars below 8 solar masses
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+_save_failed = False  # Unwritable model dirs are reported once per process
+
 class StarPredictor:
-    def __init__(self):
-        self.model = DecisionTreeClassifier(random_state=42)
+    # Parameter ranges exposed by ParameterControls
+    MASS_RANGE = (8, 50)
+    METALLICITY_RANGE = (0.001, 0.03)
+
+    def __init__(self, cache_size=1024, lookup_grid=False, model_dir=None, training_config=None):
+        self.training_config = {**TRAINING_CONFIG, **(training_config or {})}
+        self.model_dir = model_dir or os.environ.get('BETELGEUSE_MODEL_DIR', DEFAULT_MODEL_DIR)
+        self.model_path = None
+        self.nodes = None
         self.initialize_model()
-        
+
+        # Memoized predictions keyed on quantized (mass, metallicity)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.mass_quantum = 0.01
+        self.metallicity_quantum = 0.0001
+
+        # Rasterized outcome maps keyed by resolution
+        self.outcome_maps = {}
+
+        # Optional dense table answering without sklearn
+        self.grid = None
+        self.grid_values = None
+        self.grid_error = None
+        if lookup_grid:
+            self.build_lookup_grid()
+
     def initialize_model(self):
-        # Generate training data based on astronomical principles
-        masses = np.linspace(8, 50, 100)  # Stars from 8 to 50 solar masses
-        metallicities = np.random.uniform(0.005, 0.02, 100)  # Typical metallicity ranges
-        
+        # Load the exported decision table; only retrain (and import sklearn) when the config changed
+        self.model_path = os.path.join(self.model_dir, f"star_predictor-v{MODEL_FORMAT_VERSION}-{self.config_hash()}.npy")
+        try:
+            nodes = np.load(self.model_path, mmap_mode='r')
+            if nodes.dtype != NODE_DTYPE:
+                raise ValueError(f"Unexpected model layout in {self.model_path}")
+        except (OSError, ValueError):
+            nodes = self._train()
+            self._save(nodes)
+        self._set_nodes(nodes)
+
+    def config_hash(self):
+        payload = json.dumps({'format': MODEL_FORMAT_VERSION, **self.training_config}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def _train(self):
+        from sklearn.tree import DecisionTreeClassifier
+        config = self.training_config
+
+        # Generate training data based on astronomical principles (seeded, so retraining is reproducible)
+        rng = np.random.default_rng(config['seed'])
+        masses = np.linspace(*config['mass_range'], config['samples'])
+        metallicities = rng.uniform(*config['metallicity_range'], config['samples'])
+
         # Prepare features
         X = np.column_stack([masses, metallicities])
-        
+
         # Generate labels (0: Neutron Star, 1: Black Hole)
-        # Stars above ~25 solar masses typically form black holes
-        y = (masses > 25).astype(int)
-        
+        y = (masses > config['black_hole_mass']).astype(int)
+
         # Train the model
-        self.model.fit(X, y)
-        
+        model = DecisionTreeClassifier(random_state=config['random_state'])
+        model.fit(X, y)
+        return self._export_tree(model)
+
+    @staticmethod
+    def _export_tree(model):
+        tree = model.tree_
+        nodes = np.zeros(tree.node_count, dtype=NODE_DTYPE)
+        nodes['feature'] = tree.feature
+        nodes['threshold'] = tree.threshold
+        nodes['left'] = tree.children_left
+        nodes['right'] = tree.children_right
+
+        # Normalize per-node class weights into probabilities for classes 0 and 1
+        values = tree.value[:, 0, :]
+        for column, label in enumerate(model.classes_):
+            nodes['proba'][:, int(label)] = values[:, column]
+        nodes['proba'] /= nodes['proba'].sum(axis=1, keepdims=True)
+        return nodes
+
+    def _save(self, nodes):
+        global _save_failed
+        # Write then rename so a concurrent start never sees a partial file
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, nodes)
+            os.replace(tmp_path, self.model_path)
+        except OSError as e:
+            # Read-only install: keep the freshly trained table in memory and retrain next launch
+            if not _save_failed:
+                _save_failed = True
+                print(f"Warning: could not save the predictor model to {self.model_dir}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _set_nodes(self, nodes):
+        self.nodes = nodes
+        # Plain lists make single-sample traversal cheap
+        self.node_feature = nodes['feature'].tolist()
+        self.node_threshold = nodes['threshold'].tolist()
+        self.node_left = nodes['left'].tolist()
+        self.node_right = nodes['right'].tolist()
+
+    def _predict_one(self, mass, metallicity):
+        features = (mass, metallicity)
+        node = 0
+        while self.node_left[node] != -1:
+            if features[self.node_feature[node]] <= self.node_threshold[node]:
+                node = self.node_left[node]
+            else:
+                node = self.node_right[node]
+        return self.nodes['proba'][node].tolist()
+
+    def predict_proba(self, features):
+        # Batched traversal of the decision table; returns (n, 2) class probabilities
+        features = np.asarray(features, dtype=np.float64)
+        rows = np.arange(len(features))
+        node = np.zeros(len(features), dtype=np.int64)
+        left = self.nodes['left']
+        right = self.nodes['right']
+        while True:
+            active = left[node] != -1
+            if not active.any():
+                break
+            current = node[active]
+            feature = np.maximum(self.nodes['feature'][current], 0)
+            go_left = features[rows[active], feature] <= self.nodes['threshold'][current]
+            node[active] = np.where(go_left, left[current], right[current])
+        return np.asarray(self.nodes['proba'][node])
+
     def predict_final_stage(self, mass, metallicity=0.02):
         # Input validation
-        if mass < 8:
-            return "White Dwarf"  # Stars below 8 solar masses
-        
-        # Prepare input for prediction
-        features = np.array([[mass, metallicity]])
-        prediction = self.model.predict(features)[0]
-        
-        # Get prediction probability
-        prob = self.model.predict_proba(features)[0]
+        if mass < WHITE_DWARF_MASS:
+            return {
+                'final_stage': OUTCOME_NAMES[WHITE_DWARF],
+                'confidence': 100.0,
+                'probability': {
+                    'neutron_star': 0.0,
+                    'black_hole': 0.0
+                }
+            }
+
+        key = (round(mass / self.mass_quantum), round(metallicity / self.metallicity_quantum))
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            return result
+
+        # Answer for the quantized point itself, so a cached result never depends on call order
+        mass, metallicity = key[0] * self.mass_quantum, key[1] * self.metallicity_quantum
+        prob = self._lookup_grid(mass, metallicity)
+        if prob is None:
+            prob = self._predict_one(mass, metallicity)
+        result = self._format_prediction(prob)
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def _format_prediction(self, prob):
+        # Class 1 wins only when strictly more likely, matching the classifier's argmax
         confidence = max(prob) * 100
-        
-        result = "Black Hole" if prediction == 1 else "Neutron Star"
+        result = OUTCOME_NAMES[BLACK_HOLE] if prob[1] > prob[0] else OUTCOME_NAMES[NEUTRON_STAR]
         return {
             'final_stage': result,
             'confidence': confidence,
@@ -42,4 +212,85 @@ class StarPredictor:
                 'neutron_star': prob[0] * 100,
                 'black_hole': prob[1] * 100
             }
-        }
\ No newline at end of file
+        }
+
+    def predict_batch(self, masses, metallicities):
+        # One model call for the whole batch; probabilities are indexed by outcome code
+        masses, metallicities = np.broadcast_arrays(np.asarray(masses, dtype=np.float64),
+                                                    np.asarray(metallicities, dtype=np.float64))
+        shape = masses.shape
+        masses = masses.ravel()
+        metallicities = metallicities.ravel()
+
+        probability = np.zeros((len(masses), 3), dtype=np.float32)
+        probability[:, :2] = self.predict_proba(np.column_stack([masses, metallicities]))
+        white_dwarf = masses < WHITE_DWARF_MASS
+        probability[white_dwarf] = (0, 0, 1)
+
+        outcome = np.where(probability[:, BLACK_HOLE] > probability[:, NEUTRON_STAR], BLACK_HOLE, NEUTRON_STAR)
+        outcome[white_dwarf] = WHITE_DWARF
+        return {
+            'outcome': outcome.astype(np.uint8).reshape(shape),
+            'confidence': (probability.max(axis=1) * 100).reshape(shape),
+            'probability': (probability * 100).reshape(shape + (3,))
+        }
+
+    def outcome_map(self, mass_steps, metallicity_steps):
+        # Outcome codes over the full slider ranges: rows follow mass, columns metallicity
+        key = (mass_steps, metallicity_steps)
+        if key not in self.outcome_maps:
+            masses = np.linspace(*self.MASS_RANGE, mass_steps)
+            metallicities = np.linspace(*self.METALLICITY_RANGE, metallicity_steps)
+            self.outcome_maps[key] = self.predict_batch(masses[:, None], metallicities[None, :])['outcome']
+        return self.outcome_maps[key]
+
+    def build_lookup_grid(self, samples=2000, tolerance=1e-6):
+        # Precompute class probabilities at every quantized point in the slider ranges in one model call
+        mass_steps = round((self.MASS_RANGE[1] - self.MASS_RANGE[0]) / self.mass_quantum) + 1
+        metallicity_steps = round((self.METALLICITY_RANGE[1] - self.METALLICITY_RANGE[0]) / self.metallicity_quantum) + 1
+        masses = np.linspace(*self.MASS_RANGE, mass_steps)
+        metallicities = np.linspace(*self.METALLICITY_RANGE, metallicity_steps)
+        mm, zz = np.meshgrid(masses, metallicities, indexing='ij')
+        features = np.column_stack([mm.ravel(), zz.ravel()])
+        grid = self.predict_proba(features)[:, 1].reshape(mass_steps, metallicity_steps)
+
+        # Check the nearest-cell answers against the live model at random quantized points
+        rng = np.random.default_rng(0)
+        probe = np.column_stack([
+            np.round(rng.uniform(*self.MASS_RANGE, samples) / self.mass_quantum) * self.mass_quantum,
+            np.round(rng.uniform(*self.METALLICITY_RANGE, samples) / self.metallicity_quantum) * self.metallicity_quantum
+        ])
+        live = self.predict_proba(probe)[:, 1]
+        mi, zi = self._grid_indices(probe[:, 0], probe[:, 1], mass_steps, metallicity_steps)
+        error = np.abs(grid[mi, zi] - live)
+        self.grid_error = {
+            'max_probability_error': float(error.max()),
+            'mismatch_rate': float(np.mean((grid[mi, zi] > 0.5) != (live > 0.5)))
+        }
+
+        # Only answer from the grid when it reproduces the model's probabilities, not just its labels
+        self.grid = grid if self.grid_error['max_probability_error'] <= tolerance else None
+        self.grid_values = array('d', grid.ravel()) if self.grid is not None else None
+        self.cache.clear()
+        return self.grid_error
+
+    def _grid_indices(self, mass, metallicity, mass_steps, metallicity_steps):
+        mass_lo, mass_hi = self.MASS_RANGE
+        z_lo, z_hi = self.METALLICITY_RANGE
+        mi = np.rint((np.asarray(mass) - mass_lo) / (mass_hi - mass_lo) * (mass_steps - 1)).astype(int)
+        zi = np.rint((np.asarray(metallicity) - z_lo) / (z_hi - z_lo) * (metallicity_steps - 1)).astype(int)
+        return mi, zi
+
+    def _lookup_grid(self, mass, metallicity):
+        if self.grid is None:
+            return None
+        if not (self.MASS_RANGE[0] <= mass <= self.MASS_RANGE[1] and
+                self.METALLICITY_RANGE[0] <= metallicity <= self.METALLICITY_RANGE[1]):
+            return None
+        # Scalar nearest-cell lookup in plain Python, no NumPy dispatch
+        mass_steps, metallicity_steps = self.grid.shape
+        mi = round((mass - self.MASS_RANGE[0]) / (self.MASS_RANGE[1] - self.MASS_RANGE[0]) * (mass_steps - 1))
+        zi = round((metallicity - self.METALLICITY_RANGE[0]) /
+                   (self.METALLICITY_RANGE[1] - self.METALLICITY_RANGE[0]) * (metallicity_steps - 1))
+        black_hole = self.grid_values[mi * metallicity_steps + zi]
+        return (1 - black_hole, black_hole)
@@ -1,68 +1,143 @@
 import pygame
-import random
-import math
+import numpy as np
+from sprite_atlas import SpriteAtlas
+from starfield import Starfield
+from nebula import NebulaTextures, NEBULA_RAMP
 
 class Background:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, star_count=200, nebula_seed=0, nebula_cache=None):
         self.width = width
         self.height = height
-        self.stars = []
-        self.nebula_points = []
+        self.rng = np.random.default_rng(seed)
+        self.star_seed = int(self.rng.integers(2**32))
+        self.starfield = None
+        self.ticks = 0
+        # Fixed scenery independent of the run seed, so every launch reuses the same baked tiles
+        self.nebula = NebulaTextures(nebula_seed, cache_dir=nebula_cache)
         self.camera_x = 0
         self.camera_y = 0
         self.zoom = 1.0
-        self.generate_stars(200)
-        self.generate_nebula(50)
-        
+        self.nebula_layer = None  # Cached until the camera moves or zooms
+        self.nebula_base_color = None
+        self.nebula_stand_in = None  # Baked tile count when a stand-in level was drawn; redrawn as tiles land
+        self.presented_state = None  # For dirty-rect rendering
+
+        # Stars are stamped from pre-rendered gray discs, one palette entry per brightness level
+        self.brightness_levels = 32
+        self.star_atlas = SpriteAtlas(min_radius=1, max_radius=6, alpha_buckets=1)
+        levels = np.linspace(0, 255, self.brightness_levels).astype(int)
+        self.star_atlas.use_palette([(v, v, v) for v in levels.tolist()])
+        self.star_levels = levels.astype(np.uint8)
+        self.max_stamp_radius = 2
+        self.footprints = {}
+
+        self.generate_stars(star_count)
+
     def generate_stars(self, count):
-        self.stars = []
-        for _ in range(count):
-            self.stars.append({
-                'x': random.randint(-self.width, self.width*2),
-                'y': random.randint(-self.height, self.height*2),
-                'size': random.uniform(1, 3),
-                'brightness': random.uniform(0.3, 1.0),
-                'twinkle_speed': random.uniform(0.01, 0.05)
-            })
-            
-    def generate_nebula(self, count):
-        self.nebula_points = []
-        for _ in range(count):
-            self.nebula_points.append({
-                'x': random.randint(-self.width//2, int(self.width*1.5)),  # Fixed: Convert to int
-                'y': random.randint(-self.height//2, int(self.height*1.5)),  # Fixed: Convert to int
-                'radius': random.randint(50, 200),
-                'color': (random.randint(20, 60), random.randint(20, 60), random.randint(50, 100)),
-                'alpha': random.randint(20, 50)
-            })
-    
-    def update(self):
-        for star in self.stars:
-            star['brightness'] = 0.3 + (math.sin(pygame.time.get_ticks() * star['twinkle_speed']) + 1) * 0.35
-            
+        # 'count' stars per 3x-window region, spread over an infinite tiled sky
+        density = count / (9 * self.width * self.height)
+        self.starfield = Starfield(density, seed=self.star_seed)
+
+    def update(self, ticks=None):
+        # Headless renders pass a frame-based tick count so twinkle is reproducible
+        if ticks is None:
+            ticks = pygame.time.get_ticks()
+        # Twinkle is evaluated at draw time for the visible stars only
+        self.ticks = ticks
+
     def apply_zoom(self, factor):
         self.zoom = max(0.5, min(2.0, self.zoom * factor))
-        
+        self.nebula_layer = None
+
+    def set_view(self, camera_x, camera_y, zoom):
+        # Absolute camera, for replays
+        if (camera_x, camera_y, zoom) != (self.camera_x, self.camera_y, self.zoom):
+            self.camera_x, self.camera_y, self.zoom = camera_x, camera_y, zoom
+            self.nebula_layer = None
+
     def move_camera(self, dx, dy):
         self.camera_x += dx / self.zoom
         self.camera_y += dy / self.zoom
-        
-    def draw(self, screen):
-        # Draw nebula
-        nebula_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        for point in self.nebula_points:
-            x = (point['x'] + self.camera_x) * self.zoom
-            y = (point['y'] + self.camera_y) * self.zoom
-            color = (*point['color'], point['alpha'])
-            pygame.draw.circle(nebula_surface, color, (int(x), int(y)), 
-                             int(point['radius'] * self.zoom))
-        screen.blit(nebula_surface, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
-        
-        # Draw stars
-        for star in self.stars:
-            x = (star['x'] + self.camera_x) * self.zoom
-            y = (star['y'] + self.camera_y) * self.zoom
-            if 0 <= x <= self.width and 0 <= y <= self.height:
-                brightness = int(255 * star['brightness'])
-                pygame.draw.circle(screen, (brightness, brightness, brightness), 
-                                 (int(x), int(y)), int(star['size'] * self.zoom))
\ No newline at end of file
+        self.nebula_layer = None
+
+    def dirty_rects(self):
+        # Regions changed since the last call; stars are everywhere, so it is all or nothing
+        state = (self.camera_x, self.camera_y, self.zoom, self.ticks,
+                 self.nebula_stand_in is not None and self.nebula.baked_tiles)
+        if state == self.presented_state:
+            return []
+        self.presented_state = state
+        return [pygame.Rect(0, 0, self.width, self.height)]
+
+    def _render_nebula(self, base_color):
+        # Pre-baked density, colored through a palette: opaque over the base color, or additive without one
+        baked_tiles = self.nebula.baked_tiles
+        density, exact = self.nebula.view(self.width, self.height, self.camera_x, self.camera_y, self.zoom)
+        self.nebula_stand_in = None if exact else baked_tiles
+        indexed = pygame.Surface((self.width, self.height), 0, 8)
+        pygame.surfarray.blit_array(indexed, density.T)
+        palette = NEBULA_RAMP if base_color is None else np.minimum(NEBULA_RAMP + base_color, 255)
+        indexed.set_palette([tuple(color) for color in palette.tolist()])
+        nebula_surface = pygame.Surface((self.width, self.height))
+        nebula_surface.blit(indexed, (0, 0))
+        return nebula_surface
+
+    def draw(self, screen, base_color=None):
+        # Draw nebula from the cached layer. With a base color it is opaque and replaces
+        # the screen fill; without one it adds onto whatever is already there.
+        if (self.nebula_layer is None or self.nebula_base_color != base_color or
+                self.nebula_stand_in not in (None, self.nebula.baked_tiles)):
+            self.nebula_layer = self._render_nebula(base_color)
+            self.nebula_base_color = base_color
+        if base_color is None:
+            screen.blit(self.nebula_layer, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+        else:
+            screen.blit(self.nebula_layer, (0, 0))
+
+        # Only tiles inside the viewport are touched (padded by the largest star radius)
+        pad = 3
+        left = -self.camera_x - pad
+        top = -self.camera_y - pad
+        stars = self.starfield.visible_stars(left, top, left + self.width / self.zoom + 2 * pad,
+                                             top + self.height / self.zoom + 2 * pad)
+        x = (stars['x'] + self.camera_x) * self.zoom
+        y = (stars['y'] + self.camera_y) * self.zoom
+        radius = (stars['size'] * self.zoom).astype(np.int32)
+        visible = (x >= 0) & (x <= self.width) & (y >= 0) & (y <= self.height) & (radius >= 1)
+        x, y, radius = x[visible], y[visible], radius[visible]
+        brightness = 0.3 + (np.sin(np.float64(self.ticks) * stars['twinkle_speed'][visible]) + 1) * 0.35
+        level = (brightness * (self.brightness_levels - 1)).round().astype(np.int32)
+
+        # Small stars (the vast majority) are stamped straight into the pixels
+        small = radius <= self.max_stamp_radius
+        self._stamp_stars(screen, x[small].astype(np.int32), y[small].astype(np.int32),
+                          radius[small], self.star_levels[level[small]])
+
+        # Larger stars go through the sprite atlas in one batched blit
+        large = ~small
+        self.star_atlas.draw(screen, x[large], y[large], level[large], radius[large],
+                             np.ones(int(large.sum()), dtype=np.float32))
+
+    def _footprint(self, radius):
+        # Pixel offsets pygame.draw.circle covers for a disc sprite of this radius
+        if radius not in self.footprints:
+            mask = pygame.Surface((radius * 2, radius * 2))
+            pygame.draw.circle(mask, (255, 255, 255), (radius, radius), radius)
+            dx, dy = np.nonzero(pygame.surfarray.array2d(mask))
+            self.footprints[radius] = list(zip((dx - radius).tolist(), (dy - radius).tolist()))
+        return self.footprints[radius]
+
+    def _stamp_stars(self, screen, x, y, radius, values):
+        if len(x) == 0:
+            return
+        clip = screen.get_clip()  # Direct pixel writes must honor the clip like blits do
+        pixels = pygame.surfarray.pixels3d(screen)
+        for r in np.unique(radius).tolist():
+            group = radius == r
+            gx, gy, gv = x[group], y[group], values[group]
+            for dx, dy in self._footprint(r):
+                px = gx + dx
+                py = gy + dy
+                inside = (px >= clip.left) & (px < clip.right) & (py >= clip.top) & (py < clip.bottom)
+                pixels[px[inside], py[inside]] = gv[inside, None]
+        del pixels  # Unlock the surface
@@ -0,0 +1,240 @@
+import os
+# Benchmarks run off-screen; must be set before pygame initializes its display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pygame
+from main import BetelgeuseSimulation
+from profiler import FrameProfiler
+from recorder import StreamingRecorder
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then left out
+    resource = None
+
+FRAME_MS = 1000 / 60
+
+# Simulated time that holds the star in each stage
+STAGE_TIMES = {
+    'nebula': 0.2,
+    'protostar': 1.0,
+    'main_sequence': 5.0,
+    'red_supergiant': 10.0,
+    'supernova': 11.95,
+    'final': 12.0
+}
+
+def _scenario(name, **overrides):
+    scenario = {
+        'name': name,
+        'time': STAGE_TIMES['main_sequence'],
+        'mass': 20,
+        'metallicity': 0.02,
+        'particles': 150,
+        'stars': 200,
+        'graphs': False,
+        'ai': False,
+        'recording': False
+    }
+    scenario.update(overrides)
+    return scenario
+
+def default_scenarios():
+    scenarios = [_scenario(f"stage_{stage}", time=t) for stage, t in STAGE_TIMES.items()]
+    scenarios += [_scenario(f"mass_{mass}", mass=mass, time=STAGE_TIMES['red_supergiant'])
+                  for mass in (8, 20, 35, 50)]
+    scenarios += [_scenario(f"particles_{count}", particles=count) for count in (150, 1000, 5000)]
+    scenarios += [_scenario(f"stars_{count}", stars=count) for count in (200, 5000, 50000)]
+    scenarios += [
+        _scenario("panels_graphs", graphs=True),
+        _scenario("panels_ai", ai=True),
+        _scenario("panels_all", graphs=True, ai=True),
+        _scenario("recording", graphs=True, ai=True, recording=True)
+    ]
+    return scenarios
+
+def _create_app(scenario, seed):
+    app = BetelgeuseSimulation(seed=seed, particle_count=scenario['particles'])
+    app.profiler = FrameProfiler()
+    if scenario['stars'] != 200:
+        app.background.generate_stars(scenario['stars'])
+    app.controls.parameters["Mass (Solar Masses)"] = scenario['mass']
+    app.controls.parameters["Metallicity"] = scenario['metallicity']
+    app.timeline.current_time = scenario['time']
+    app.show_graphs = scenario['graphs']
+    app.show_ai_analysis = scenario['ai']
+    app.show_hints = True
+    return app
+
+def _step(app, index, recorder):
+    profiler = app.profiler
+    profiler.start_frame()
+    app.update_frame(ticks=int(index * FRAME_MS))
+    profiler.mark('update')
+    app.draw_frame()
+    pygame.display.flip()
+    profiler.mark('present')
+    if recorder is not None:
+        recorder.capture(app.screen)
+        profiler.mark('recording')
+    profiler.end_frame()
+
+def run_scenario(scenario, frames=300, warmup=30, seed=0):
+    # Runs in a fresh worker process so peak RSS belongs to this scenario alone
+    app = _create_app(scenario, seed)
+    recorder = None
+    video_dir = tempfile.mkdtemp(prefix="bench_")
+    if scenario['recording']:
+        recorder = StreamingRecorder(os.path.join(video_dir, "bench.mp4"), app.screen.get_size())
+
+    try:
+        for index in range(warmup):
+            _step(app, index, recorder)
+
+        app.profiler = FrameProfiler(window=frames, max_frames=frames)
+        app.profiler.enable()
+        start = time.perf_counter()
+        for index in range(warmup, warmup + frames):
+            _step(app, index, recorder)
+        elapsed = time.perf_counter() - start
+    finally:
+        if recorder is not None:
+            recorder.close()
+        pygame.quit()
+        shutil.rmtree(video_dir, ignore_errors=True)
+
+    stats = app.profiler.percentiles()
+    frame_stats = stats.pop('frame')
+    return {
+        **scenario,
+        'frames': frames,
+        'fps': frames / elapsed,
+        'frame_ms': dict(zip(('p50', 'p95', 'p99'), frame_stats)),
+        'stages': {stage: dict(zip(('p50', 'p95', 'p99'), values))
+                   for stage, values in stats.items() if values[2] > 0},
+        'peak_rss_kb': peak_rss_kb(),
+        'dropped_frames': recorder.dropped_frames if recorder is not None else 0
+    }
+
+def peak_rss_kb():
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_benchmarks(scenarios, frames=300, warmup=30, seed=0, workers=1):
+    # One scenario per spawned process (peak RSS is per process); more than one worker trades
+    # timing accuracy for wall time
+    context = multiprocessing.get_context("spawn")
+    if sys.version_info >= (3, 11):
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1) as pool:
+            futures = [pool.submit(run_scenario, scenario, frames, warmup, seed) for scenario in scenarios]
+            results = {future.result()['name']: future.result() for future in futures}
+    else:
+        # No max_tasks_per_child before 3.11: a fresh single-worker pool per scenario, one at a time
+        results = {}
+        for scenario in scenarios:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_scenario, scenario, frames, warmup, seed).result()
+            results[result['name']] = result
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'frames': frames,
+            'warmup': warmup,
+            'seed': seed
+        },
+        'scenarios': results
+    }
+
+def compare(results, baseline, tolerance=0.15, memory_tolerance=0.25):
+    # Returns (name, metric, baseline value, current value) for every metric past its tolerance
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if current['fps'] < previous['fps'] * (1 - tolerance):
+            regressions.append((name, 'fps', previous['fps'], current['fps']))
+        if current['frame_ms']['p95'] > previous['frame_ms']['p95'] * (1 + tolerance):
+            regressions.append((name, 'frame_ms.p95', previous['frame_ms']['p95'], current['frame_ms']['p95']))
+        if current['peak_rss_kb'] and previous['peak_rss_kb'] and \
+                current['peak_rss_kb'] > previous['peak_rss_kb'] * (1 + memory_tolerance):
+            regressions.append((name, 'peak_rss_kb', previous['peak_rss_kb'], current['peak_rss_kb']))
+    return regressions
+
+def _print_results(results, baseline=None):
+    print(f"{'scenario':<24}{'fps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>9}{'vs base':>10}")
+    for name, result in results['scenarios'].items():
+        frame_ms = result['frame_ms']
+        rss = f"{result['peak_rss_kb'] / 1024:9.1f}" if result['peak_rss_kb'] else f"{'-':>9}"
+        line = (f"{name:<24}{result['fps']:9.1f}{frame_ms['p50']:9.2f}{frame_ms['p95']:9.2f}"
+                f"{frame_ms['p99']:9.2f}{rss}")
+        previous = baseline['scenarios'].get(name) if baseline else None
+        if previous:
+            line += f"{(result['fps'] / previous['fps'] - 1) * 100:+9.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless performance benchmarks for the simulator")
+    parser.add_argument("--scenarios", nargs="*", default=["*"], metavar="PATTERN",
+                        help="scenario names or glob patterns, e.g. stage_* particles_*")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured frames run first (fills caches)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="scenarios run in parallel; keep at 1 for stable timings")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a stored results file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed fractional fps / p95 frame time regression")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25,
+                        help="allowed fractional peak memory growth")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in default_scenarios()
+                 if any(fnmatch.fnmatch(scenario['name'], pattern) for pattern in args.scenarios)]
+    if args.list or not scenarios:
+        for scenario in scenarios or default_scenarios():
+            print(scenario['name'])
+        return 0
+
+    results = run_benchmarks(scenarios, args.frames, args.warmup, args.seed, args.workers)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    _print_results(results, baseline)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for name, metric, previous, current in regressions:
+        print(f"REGRESSION {name}: {metric} {previous:.2f} -> {current:.2f}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
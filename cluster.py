@@ -0,0 +1,85 @@
+import numpy as np
+import pygame
+from evolution_track import STAGE_BOUNDARIES
+from ai_predictor import WHITE_DWARF
+from sprite_atlas import SpriteAtlas
+
+FINAL = 5
+
+# One color per stage; the final stage is colored by the predicted remnant instead
+STAGE_COLORS = [(100, 150, 200), (255, 200, 150), (255, 255, 200), (255, 100, 50), (255, 255, 255)]
+REMNANT_COLORS = [(120, 160, 255), (60, 30, 70), (230, 230, 230)]  # Neutron star, black hole, white dwarf
+STAGE_SIZES = np.array([1.5, 1.2, 1.0, 2.5, 4.0, 0.6])  # Sprite scale per stage, like size_multipliers
+
+class StarCluster:
+    # Thousands of stars as parallel arrays, evolved together on the shared timeline
+    def __init__(self, predictor, count=2000, seed=None, mass_range=(8, 50), imf_slope=2.35,
+                 metallicity_range=(0.001, 0.03), rate_exponent=1.0, spread=180):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+
+        # Salpeter-style power-law IMF, dN/dM ∝ M^-slope, sampled by inverting its CDF
+        lo, hi = mass_range
+        k = 1 - imf_slope
+        u = self.rng.random(count)
+        self.mass = ((lo ** k + u * (hi ** k - lo ** k)) ** (1 / k)).astype(np.float32)
+        self.metallicity = self.rng.uniform(*metallicity_range, count).astype(np.float32)
+
+        # Heavier stars run through the stages faster; a 20 M☉ star keeps the single-star timeline
+        self.rate = (self.mass / 20) ** rate_exponent
+
+        # Gaussian cluster around the origin, heavier stars sinking towards the core
+        concentration = np.sqrt(20 / self.mass)
+        self.x = (self.rng.normal(0, spread, count) * concentration).astype(np.float32)
+        self.y = (self.rng.normal(0, spread, count) * concentration).astype(np.float32)
+
+        # Remnant of every star, predicted in one batch
+        self.outcome = predictor.predict_batch(self.mass, self.metallicity)['outcome']
+
+        self.stage = np.zeros(count, dtype=np.int8)
+        self.color_index = np.zeros(count, dtype=np.int32)
+        self.size = np.zeros(count, dtype=np.float32)
+        self.opacity = np.ones(count, dtype=np.float32)
+        self.atlas = SpriteAtlas(min_radius=1, max_radius=8, alpha_buckets=4)
+        self.atlas.use_palette(STAGE_COLORS + REMNANT_COLORS)
+        self.time = None
+        self.version = 0
+        self.presented_state = None  # For dirty-rect rendering
+        self.update(0)
+
+    def update(self, time):
+        if time == self.time:
+            return
+        self.time = time
+        stage = np.searchsorted(STAGE_BOUNDARIES, time * self.rate, side='right').astype(np.int8)
+        if not np.array_equal(stage, self.stage) or self.version == 0:
+            self.stage = stage
+            # Final stars take their remnant's palette entry
+            self.color_index = np.where(stage == FINAL, len(STAGE_COLORS) + self.outcome, stage).astype(np.int32)
+            self.size = (1 + self.mass / 12) * STAGE_SIZES[stage]
+            self.size[(stage == FINAL) & (self.outcome == WHITE_DWARF)] = 1
+            self.opacity = np.where(stage == FINAL, 0.5, 1.0).astype(np.float32)
+            self.version += 1
+
+    def dirty_rects(self, screen_size, camera):
+        # Stars only change on stage transitions (or camera moves), and they span the screen
+        state = (self.version, camera)
+        if state == self.presented_state:
+            return []
+        self.presented_state = state
+        return [pygame.Rect((0, 0), screen_size)]
+
+    def stage_counts(self):
+        return np.bincount(self.stage, minlength=FINAL + 1)
+
+    def remnant_counts(self):
+        # Predicted outcomes of the stars that have already ended
+        return np.bincount(self.outcome[self.stage == FINAL], minlength=3)
+
+    def draw(self, screen, camera_x=0, camera_y=0, zoom=1.0):
+        # One batched blit; the atlas culls stars outside the screen
+        cx = screen.get_width() / 2
+        cy = screen.get_height() / 2
+        xs = cx + (self.x + camera_x) * zoom
+        ys = cy + (self.y + camera_y) * zoom
+        self.atlas.draw(screen, xs, ys, self.color_index, self.size * zoom, self.opacity)
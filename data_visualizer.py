@@ -1,49 +1,64 @@
 import pygame
-import random
-import math
-import time
+import numpy as np
+from ring_buffer import RingBuffer
+from ui_cache import get_font
 
 class DataVisualizer:
-    def __init__(self, width, height):
+    def __init__(self, width, height, max_points=100):
         self.width = width
         self.height = height
+        self.max_points = max_points
         self.data = {
-            'Temperature (K)': [],
-            'Mass (Solar)': [],
-            'Luminosity (Solar)': []
+            'Temperature (K)': RingBuffer(max_points),
+            'Mass (Solar)': RingBuffer(max_points),
+            'Luminosity (Solar)': RingBuffer(max_points)
         }
-        self.max_points = 100
         self.colors = {
             'Temperature (K)': (255, 100, 100),
             'Mass (Solar)': (100, 255, 100),
             'Luminosity (Solar)': (100, 100, 255)
         }
         
+        # Static panel is built once; labels only re-render when their text changes (kept out of the
+        # shared text cache, since the values change every sample)
+        self.panel = pygame.Surface((400, 500), pygame.SRCALPHA)
+        pygame.draw.rect(self.panel, (20, 20, 40, 200), (0, 0, 400, 500))
+        self.labels = {}
+        self.graph_x = 30
+        self.graph_width = 360
+        self.columns_cache = None
+        self.panel_rect = pygame.Rect(20, 20, 400, 500)
+        
+        # Bumped on every new sample, for dirty-rect rendering
+        self.version = 0
+        self.presented_version = None
+        
     def update(self, simulation):
         try:
-            # Simple data collection without stage checks
-            temp = 3000 + (simulation.time * 1000)  # Temperature increases with time
-            mass = simulation.mass
-            lum = mass * (1 + simulation.time)  # Luminosity increases with time
-            
-            # Add small variations
-            temp += random.uniform(-100, 100)
-            mass += random.uniform(-0.05, 0.05)
-            lum += random.uniform(-0.1, 0.1)
+            # Values come from the precomputed evolution track, so they match the timeline exactly
+            state = simulation.state
+            temp = state['temperature']
+            mass = state['mass']
+            lum = state['luminosity']
             
             # Update data points
             self._update_data('Temperature (K)', temp)
             self._update_data('Mass (Solar)', mass)
             self._update_data('Luminosity (Solar)', lum)
+            self.version += 1
         except Exception as e:
             print(f"Debug - Graph update error: {e}")
     
+    def dirty_rects(self):
+        if self.version == self.presented_version:
+            return []
+        self.presented_version = self.version
+        return [self.panel_rect]
+    
     def draw(self, screen):
         try:
             # Draw semi-transparent background
-            graph_surface = pygame.Surface((400, 500), pygame.SRCALPHA)
-            pygame.draw.rect(graph_surface, (20, 20, 40, 200), (0, 0, 400, 500))
-            screen.blit(graph_surface, (20, 20))
+            screen.blit(self.panel, self.panel_rect.topleft)
             
             # Create a separate area for labels and graphs
             y_offset = 40
@@ -51,29 +66,17 @@ class DataVisualizer:
             total_section_height = 160  # Total height for each section (label + graph)
             
             for key, values in self.data.items():
-                if not values:
+                if not len(values):
                     continue
                 
                 # Draw label in a fixed position above the graph area
-                font = pygame.font.Font(None, 28)
-                title = font.render(f"{key}: {values[-1]:.1f}", True, self.colors[key])
                 label_y = y_offset
-                screen.blit(title, (30, label_y))
+                screen.blit(self._label(key, f"{key}: {values[-1]:.1f}"), (30, label_y))
                 
                 # Draw graph in its own dedicated area below the label
                 if len(values) > 1:
-                    points = []
-                    max_val = max(values)
-                    min_val = min(values)
-                    range_val = max(max_val - min_val, 0.001)
-                    
                     graph_y = label_y + 30  # Start graph 30 pixels below label
-                    
-                    for i, val in enumerate(values):
-                        x = 30 + (i / self.max_points) * 360
-                        y = graph_y + ((val - min_val) / range_val) * graph_height
-                        points.append((int(x), int(y)))
-                    
+                    points = self._graph_points(values, graph_y, graph_height)
                     pygame.draw.lines(screen, self.colors[key], False, points, 2)
                 
                 y_offset += total_section_height  # Move to next section
@@ -81,37 +84,41 @@ class DataVisualizer:
         except Exception as e:
             print(f"Debug - Graph draw error: {e}")
     
-    def _get_stage_temperature(self, stage):
-        temps = {
-            'Stellar Nebula': 2000,
-            'Protostar': 3000,
-            'Main Sequence': 5000,
-            'Red Supergiant': 3500,
-            'Supernova': 100000,
-            'Final Form': 1000
-        }
-        # Get the stage value from enum
-        stage_str = stage.value
-        return temps.get(stage_str, 3000)
+    def latest(self, key, default=0):
+        values = self.data[key]
+        return values[-1] if len(values) else default
     
-    def _calculate_luminosity(self, simulation):
-        stage_multipliers = {
-            'Stellar Nebula': 0.1,
-            'Protostar': 0.5,
-            'Main Sequence': 1.0,
-            'Red Supergiant': 5.0,
-            'Supernova': 100.0,
-            'Final Form': 0.01
-        }
-        # Get the stage value from enum
-        stage_str = simulation.current_stage.value
-        mult = stage_multipliers.get(stage_str, 1.0)
+    def _label(self, key, text):
+        cached = self.labels.get(key)
+        if cached is None or cached[0] != text:
+            cached = (text, get_font(28).render(text, True, self.colors[key]))
+            self.labels[key] = cached
+        return cached[1]
+    
+    def _graph_points(self, values, graph_y, graph_height):
+        min_val = values.min()
+        range_val = max(values.max() - min_val, 0.001)
+        y = graph_y + (values.values() - min_val) * (graph_height / range_val)
         
-        # Calculate base luminosity from mass
-        base = simulation.mass ** 3.5
-        return base * mult
+        # Long histories collapse to a per-pixel-column min/max envelope
+        x, starts = self._graph_columns(len(y))
+        if starts is not None:
+            y = np.column_stack([np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)]).ravel()
+        
+        return np.column_stack([x, y]).astype(np.int32).tolist()
+    
+    def _graph_columns(self, count):
+        # X positions only depend on the sample count, so they are reused between frames
+        if self.columns_cache is None or self.columns_cache[0] != count:
+            x = self.graph_x + np.arange(count) * (self.graph_width / self.max_points)
+            starts = None
+            if count > 2 * self.graph_width:
+                columns = x.astype(np.int32)
+                starts = np.flatnonzero(np.diff(columns, prepend=columns[0] - 1))
+                x = np.repeat(columns[starts], 2)
+            self.columns_cache = (count, x, starts)
+        return self.columns_cache[1], self.columns_cache[2]
     
     def _update_data(self, key, value):
+        # Fixed-capacity ring buffer drops the oldest sample in O(1)
         self.data[key].append(value)
-        if len(self.data[key]) > self.max_points:
-            self.data[key].pop(0)
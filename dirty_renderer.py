@@ -0,0 +1,45 @@
+import pygame
+
+class DirtyRectRenderer:
+    def __init__(self, screen_size, full_redraw_ratio=0.6):
+        self.screen_rect = pygame.Rect((0, 0), screen_size)
+        # Past this share of the screen a plain full redraw and flip is just as cheap
+        self.full_redraw_ratio = full_redraw_ratio
+        self.full_redraws = 0
+        self.partial_redraws = 0
+        self.idle_frames = 0
+
+    def bounding_rect(self, rects):
+        # One region covering every change; None when a full redraw is better
+        rects = [rect.clip(self.screen_rect) for rect in rects]
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        if not rects:
+            return []
+        bounds = rects[0].unionall(rects[1:])
+        if bounds.width * bounds.height > self.full_redraw_ratio * self.screen_rect.width * self.screen_rect.height:
+            return None
+        return [bounds]
+
+    def present(self, screen, draw, rects):
+        # rects=None forces a full redraw; an empty list means nothing changed and nothing is drawn
+        if rects is not None:
+            rects = self.bounding_rect(rects)
+
+        if rects is None:
+            draw()
+            pygame.display.flip()
+            self.full_redraws += 1
+            return [self.screen_rect]
+
+        if not rects:
+            self.idle_frames += 1
+            return []
+
+        # The screen keeps last frame's pixels: a single draw pass clipped to the changed region.
+        # Separate passes per rect would repeat every layer's fixed cost (sprite batching, scaling).
+        screen.set_clip(rects[0])
+        draw()
+        screen.set_clip(None)
+        pygame.display.update(rects)
+        self.partial_redraws += 1
+        return rects
@@ -0,0 +1,123 @@
+import numpy as np
+import pygame
+
+# Cooling ramp: white-hot through yellow and orange to a dim red, indexed by temperature (0-255)
+_RAMP_STOPS = np.array([0, 60, 130, 200, 255])
+_RAMP_COLORS = np.array([(40, 5, 10), (160, 30, 20), (255, 110, 30), (255, 210, 90), (255, 255, 255)])
+COOLING_RAMP = np.column_stack([np.interp(np.arange(256), _RAMP_STOPS, _RAMP_COLORS[:, c])
+                                for c in range(3)]).astype(np.float32)
+
+class SupernovaEjecta:
+    # Pooled shell of particles, spawned at the explosion and advanced in bulk; drawing never changes state
+    def __init__(self, count=50_000, seed=None, lifetime=300, drag=0.985, clumps=64):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+        self.lifetime = lifetime  # Steps until a particle has fully faded
+        self.drag = drag
+        self.clumps = clumps  # Filaments that half the shell is concentrated into
+
+        self.x = np.zeros(count, dtype=np.float32)
+        self.y = np.zeros(count, dtype=np.float32)
+        self.vx = np.zeros(count, dtype=np.float32)
+        self.vy = np.zeros(count, dtype=np.float32)
+        self.energy = np.zeros(count, dtype=np.float32)
+        self.age = 0
+        self.active = False
+
+        self.draw_fraction = 1.0  # Level of detail: share of the pool rasterized
+
+    def spawn(self, star_size):
+        n = self.count
+        # Half the shell is uniform, half bunched into filaments
+        angle = self.rng.uniform(0, 2 * np.pi, n)
+        clumped = self.rng.random(n) < 0.5
+        centers = self.rng.uniform(0, 2 * np.pi, self.clumps)
+        angle[clumped] = (centers[self.rng.integers(0, self.clumps, int(clumped.sum()))] +
+                          self.rng.normal(0, 0.04, int(clumped.sum())))
+
+        radius = star_size * self.rng.uniform(0.3, 0.6, n)
+        speed = star_size * 0.015 * np.abs(self.rng.normal(1, 0.25, n))
+        cos, sin = np.cos(angle), np.sin(angle)
+        self.x[:] = cos * radius
+        self.y[:] = sin * radius
+        self.vx[:] = cos * speed
+        self.vy[:] = sin * speed
+        self.energy[:] = self.rng.uniform(0.4, 1.0, n)
+        self.age = 0
+        self.active = True
+
+    def clear(self):
+        self.active = False
+
+    def update(self):
+        if not self.active:
+            return
+        # Drag first, so the previous position is exactly x - v (used for interpolation)
+        self.vx *= self.drag
+        self.vy *= self.drag
+        self.x += self.vx
+        self.y += self.vy
+        self.age += 1
+        if self.age >= self.lifetime:
+            self.active = False
+
+    def _cooling(self, alpha):
+        # Shared temperature and brightness for the whole shell at this (interpolated) age
+        age = self.age - 1 + alpha
+        heat = np.exp(-age / (self.lifetime * 0.5))
+        fade = max(0.0, 1 - age / self.lifetime)
+        return COOLING_RAMP[int(heat * 255)], fade
+
+    def bounds(self, center_x, center_y):
+        # Screen box of the shell, including where interpolation can still place it
+        if not self.active:
+            return None
+        reach_x = float(np.abs(self.x).max() + np.abs(self.vx).max())
+        reach_y = float(np.abs(self.y).max() + np.abs(self.vy).max())
+        rect = pygame.Rect(0, 0, int(reach_x) * 2 + 4, int(reach_y) * 2 + 4)
+        rect.center = (center_x, center_y)
+        return rect
+
+    def draw(self, screen, center_x, center_y, alpha=1.0):
+        if not self.active:
+            return
+        shown = int(self.count * self.draw_fraction)
+        back = 1 - alpha
+        px = (center_x + self.x[:shown] - self.vx[:shown] * back).astype(np.int32)
+        py = (center_y + self.y[:shown] - self.vy[:shown] * back).astype(np.int32)
+
+        # Cull to the clip rect (one unsigned compare per axis), then splat into the particles' bounding box
+        clip = screen.get_clip()
+        inside = (((px - clip.left).view(np.uint32) < clip.width) &
+                  ((py - clip.top).view(np.uint32) < clip.height))
+        if not inside.any():
+            return
+        px, py, energy = px[inside], py[inside], self.energy[:shown][inside]
+        x0, y0 = int(px.min()), int(py.min())
+        w, h = int(px.max()) - x0 + 1, int(py.max()) - y0 + 1
+
+        color, fade = self._cooling(alpha)
+        cells = (px - x0) * h + (py - y0)
+        weight = np.bincount(cells, weights=energy, minlength=w * h)
+
+        # Visit each touched cell once, found from the particles themselves rather than by scanning the box:
+        # the last particle written into a cell owns it
+        owner = np.empty(w * h, dtype=np.int32)
+        owner[cells] = np.arange(len(cells), dtype=np.int32)
+        first = np.flatnonzero(owner[cells] == np.arange(len(cells), dtype=np.int32))
+        lit = weight[cells[first]] * (0.9 * fade)  # Per-particle brightness; dense filaments saturate
+        first = first[lit > 0.004]
+        lit = lit[lit > 0.004]
+        lx, ly = px[first] - x0, py[first] - y0
+
+        # Touched pixels are read and written once as packed 32-bit values rather than per channel
+        pixels = pygame.surfarray.pixels2d(screen)
+        region = pixels[x0:x0 + w, y0:y0 + h]
+        packed = region[lx, ly].astype(np.uint32)
+        result = np.zeros(len(lx), dtype=np.uint32)
+        for channel, shift in enumerate(screen.get_shifts()[:3]):
+            value = (packed >> shift) & 255
+            value = np.minimum(value + (lit * color[channel]).astype(np.uint32), 255)
+            result |= value << shift
+        region[lx, ly] = result
+        del pixels, region  # Unlock the surface
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import numpy as np
+
+# Stage codes follow StarStage declaration order; a stage starts at the previous boundary
+STAGE_BOUNDARIES = (0.5, 2, 8, 11.9, 11.99)
+STAGE_TEMPERATURES = (2000, 3000, 5000, 3500, 100000, 1000)  # Kelvin
+STAGE_LUMINOSITY = (0.1, 0.5, 1.0, 5.0, 100.0, 0.01)  # Multiples of mass**3.5
+
+TIME_STEP = 0.01  # Billion years per sample, the auto-play step
+END_TIME = 12
+SOLAR_TEMPERATURE = 5772
+MASS_LOSS_RATE = 0.3  # Solar masses per billion years at 1e5 L☉ and solar metallicity
+MAX_MASS_LOSS = 0.5  # Winds never strip more than half the initial mass
+
+class EvolutionTrack:
+    # Full time series for one (mass, metallicity), computed once on a fixed time grid
+    def __init__(self, mass, metallicity, time_step=TIME_STEP, end_time=END_TIME):
+        self.mass = mass
+        self.metallicity = metallicity
+        self.time_step = time_step
+        self.times = np.round(np.arange(round(end_time / time_step) + 1) * time_step, 9)
+
+        self.stage = np.searchsorted(STAGE_BOUNDARIES, self.times, side='right').astype(np.int8)
+
+        # Stage values blend over the first quarter of each stage instead of jumping
+        knots, temperatures, luminosities = self._stage_knots(end_time)
+        metal_poor = 0.02 / metallicity  # Metal-poor stars burn hotter and brighter
+        self.temperature = np.exp(np.interp(self.times, knots, np.log(temperatures))) * metal_poor ** 0.05
+        self.luminosity = (np.exp(np.interp(self.times, knots, np.log(luminosities))) *
+                           mass ** 3.5 * metal_poor ** 0.1)
+
+        # Stefan-Boltzmann: R ∝ sqrt(L) / T², in solar radii
+        self.radius = np.sqrt(self.luminosity) * (SOLAR_TEMPERATURE / self.temperature) ** 2
+
+        # Line-driven winds scale with luminosity and metallicity
+        self.mass_loss_rate = MASS_LOSS_RATE * np.sqrt(self.luminosity / 1e5) * (metallicity / 0.02) ** 0.7
+        lost = np.concatenate([[0], np.cumsum(self.mass_loss_rate[:-1] * time_step)])
+        self.current_mass = mass - np.minimum(lost, mass * MAX_MASS_LOSS)
+
+    def _stage_knots(self, end_time):
+        starts = (0,) + STAGE_BOUNDARIES
+        ends = STAGE_BOUNDARIES + (end_time,)
+        knots, temperatures, luminosities = [], [], []
+        for code, (start, end) in enumerate(zip(starts, ends)):
+            blend = min(0.25 * (end - start), 0.5)
+            for t in (start + blend, end):
+                knots.append(t)
+                temperatures.append(STAGE_TEMPERATURES[code])
+                luminosities.append(STAGE_LUMINOSITY[code])
+        return np.array(knots), np.array(temperatures, dtype=float), np.array(luminosities)
+
+    def index(self, time):
+        # Sample at or before 'time' (the epsilon absorbs float drift from accumulated steps)
+        i = int(time / self.time_step + 1e-6)
+        return min(max(i, 0), len(self.times) - 1)
+
+    def sample(self, index):
+        return {
+            'stage': int(self.stage[index]),
+            'temperature': float(self.temperature[index]),
+            'luminosity': float(self.luminosity[index]),
+            'radius': float(self.radius[index]),
+            'mass': float(self.current_mass[index]),
+            'mass_loss_rate': float(self.mass_loss_rate[index])
+        }
+
+# Tracks keyed on quantized (mass, metallicity), least recently used dropped first
+_tracks = OrderedDict()
+MAX_CACHED_TRACKS = 64
+MASS_QUANTUM = 0.01
+METALLICITY_QUANTUM = 0.0001
+
+def get_track(mass, metallicity):
+    key = (round(mass / MASS_QUANTUM), round(metallicity / METALLICITY_QUANTUM))
+    track = _tracks.get(key)
+    if track is not None:
+        _tracks.move_to_end(key)
+        return track
+    track = EvolutionTrack(key[0] * MASS_QUANTUM, max(key[1], 1) * METALLICITY_QUANTUM)
+    _tracks[key] = track
+    if len(_tracks) > MAX_CACHED_TRACKS:
+        _tracks.popitem(last=False)
+    return track
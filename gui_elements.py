@@ -1,5 +1,7 @@
 import pygame
 import pygame.font
+import numpy as np
+from ui_cache import RetainedSurface, render_text
 
 class Timeline:
     def __init__(self, width, height):
@@ -10,6 +12,11 @@ class Timeline:
         self.auto_button = pygame.Rect(width - 80, height - 50, 60, 20)
         self.auto_play = False  # Added this line
         
+        # Static parts (bar, phase markers, button) are cached; only the marker and time text change
+        self.layer_rect = pygame.Rect(0, self.slider_rect.y - 30, width, 80)
+        self.static_layer = RetainedSurface(rle=True)
+        self.presented_state = None  # For dirty-rect rendering
+        
         # Phase markers
         self.phases = [
             (0, "Nebula"),
@@ -21,30 +28,46 @@ class Timeline:
         ]
         
     def draw(self, screen):
-        # Draw timeline base
-        pygame.draw.rect(screen, (100, 100, 150), self.slider_rect)
-        
-        # Draw phase markers
-        font = pygame.font.Font(None, 20)
-        for time, phase in self.phases:
-            x = self.slider_rect.x + (time / 12) * self.slider_rect.width
-            pygame.draw.line(screen, (200, 200, 250), (x, self.slider_rect.y), (x, self.slider_rect.y + self.slider_rect.height), 2)
-            text = font.render(phase, True, (200, 200, 250))
-            screen.blit(text, (x - 20, self.slider_rect.y + 25))
+        screen.blit(self.static_layer.get(self.auto_play, self._render_static_layer), self.layer_rect.topleft)
         
         # Draw current time marker
         pos_x = self.slider_rect.x + (self.current_time / 12) * self.slider_rect.width
         pygame.draw.circle(screen, (255, 255, 100), (int(pos_x), self.slider_rect.centery), 8)
         
         # Draw year text
-        year_text = font.render(f"Time: {self.current_time:.1f} billion years", True, (200, 200, 250))
+        year_text = render_text(f"Time: {self.current_time:.1f} billion years", 20, (200, 200, 250))
         screen.blit(year_text, (self.slider_rect.x, self.slider_rect.y - 25))
+    
+    def dirty_rects(self):
+        pos_x = int(self.slider_rect.x + (self.current_time / 12) * self.slider_rect.width)
+        state = (pos_x, f"{self.current_time:.1f}", self.auto_play)
+        if state == self.presented_state:
+            return []
+        self.presented_state = state
+        return [self.layer_rect]
+    
+    def _render_static_layer(self):
+        layer = pygame.Surface(self.layer_rect.size, pygame.SRCALPHA)
+        ox, oy = -self.layer_rect.x, -self.layer_rect.y
+        slider_rect = self.slider_rect.move(ox, oy)
+        
+        # Draw timeline base
+        pygame.draw.rect(layer, (100, 100, 150), slider_rect)
+        
+        # Draw phase markers
+        for time, phase in self.phases:
+            x = slider_rect.x + (time / 12) * slider_rect.width
+            pygame.draw.line(layer, (200, 200, 250), (x, slider_rect.y), (x, slider_rect.y + slider_rect.height), 2)
+            text = render_text(phase, 20, (200, 200, 250))
+            layer.blit(text, (x - 20, slider_rect.y + 25), special_flags=pygame.BLEND_RGBA_MAX)
         
         # Draw auto-play button
+        auto_button = self.auto_button.move(ox, oy)
         color = (100, 200, 100) if self.auto_play else (150, 150, 150)
-        pygame.draw.rect(screen, color, self.auto_button)
-        auto_text = font.render("Auto", True, (0, 0, 0))
-        screen.blit(auto_text, (self.auto_button.x + 5, self.auto_button.y + 2))
+        pygame.draw.rect(layer, color, auto_button)
+        auto_text = render_text("Auto", 20, (0, 0, 0))
+        layer.blit(auto_text, (auto_button.x + 5, auto_button.y + 2))
+        return layer
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -69,10 +92,12 @@ class Timeline:
                 self.current_time = (rel_x / self.slider_rect.width) * 12
                 self.current_time = max(0, min(12, self.current_time))
 class ParameterControls:
+    # Overlay tint per outcome code (neutron star, black hole, white dwarf)
+    OUTCOME_COLORS = np.array([(70, 130, 255), (200, 60, 200), (230, 230, 230)], dtype=np.uint8)
+    
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.font = pygame.font.Font(None, 32)
         self.parameters = {
             "Mass (Solar Masses)": 20,
             "Metallicity": 0.02
@@ -81,6 +106,15 @@ class ParameterControls:
         self.max_values = {"Mass (Solar Masses)": 50, "Metallicity": 0.03}
         self.dragging = None
         
+        # Sliders only re-render when a value changes
+        self.layer = RetainedSurface(rle=True)
+        self.layer_rect = pygame.Rect(0, 0, width, 50 + len(self.parameters) * 60 + 30)
+        
+        # Optional mass (x) / metallicity (y) outcome map drawn behind the sliders
+        self.overlay_rect = pygame.Rect(50, 15, width - 300, 125)
+        self.outcome_overlay = None
+        self.presented_state = None  # For dirty-rect rendering
+        
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = pygame.mouse.get_pos()
@@ -106,18 +140,59 @@ class ParameterControls:
     def _get_slider_rect(self, index):
         return pygame.Rect(50, 50 + index * 60, self.width - 300, 20)
         
+    def set_outcome_map(self, outcome_codes):
+        # outcome_codes: (mass steps, metallicity steps) array from StarPredictor.outcome_map
+        if outcome_codes is None:
+            self.outcome_overlay = None
+        else:
+            surface = pygame.surfarray.make_surface(self.OUTCOME_COLORS[outcome_codes])
+            if surface.get_size() != self.overlay_rect.size:
+                surface = pygame.transform.scale(surface, self.overlay_rect.size)
+            surface.set_alpha(70)
+            self.outcome_overlay = surface
+        self.layer.invalidate()
+        
     def draw(self, screen):
+        if self.outcome_overlay is not None:
+            screen.blit(self.outcome_overlay, self.overlay_rect.topleft)
+        key = (tuple(self.parameters.values()), self.outcome_overlay is not None)
+        screen.blit(self.layer.get(key, self._render_layer), self.layer_rect.topleft)
+        
+    def dirty_rects(self):
+        state = (tuple(self.parameters.values()), self.outcome_overlay is not None)
+        if state == self.presented_state:
+            return []
+        self.presented_state = state
+        return [self.layer_rect, self.overlay_rect]
+        
+    def _render_layer(self):
+        layer = pygame.Surface(self.layer_rect.size, pygame.SRCALPHA)
+        if self.outcome_overlay is not None:
+            self._draw_overlay_marker(layer)
         for i, (param, value) in enumerate(self.parameters.items()):
             # Draw parameter name
-            text = self.font.render(f"{param}: {value:.2f}", True, (200, 200, 250))
-            screen.blit(text, (50, 20 + i * 60))
+            text = render_text(f"{param}: {value:.2f}", 32, (200, 200, 250))
+            layer.blit(text, (50, 20 + i * 60), special_flags=pygame.BLEND_RGBA_MAX)
             
             # Draw slider
             slider_rect = self._get_slider_rect(i)
-            pygame.draw.rect(screen, (100, 100, 150), slider_rect)
+            pygame.draw.rect(layer, (100, 100, 150), slider_rect)
             
             # Draw slider handle
             handle_x = 50 + (value - self.min_values[param]) / \
                 (self.max_values[param] - self.min_values[param]) * (self.width - 300)
-            pygame.draw.circle(screen, (255, 255, 100), 
-                             (int(handle_x), slider_rect.centery), 15)
\ No newline at end of file
+            pygame.draw.circle(layer, (255, 255, 100), 
+                             (int(handle_x), slider_rect.centery), 15)
+        return layer
+
+    
+    def _draw_overlay_marker(self, layer):
+        # Mark the current (mass, metallicity) on the outcome map
+        mass_param, metallicity_param = list(self.parameters)[:2]
+        fx = (self.parameters[mass_param] - self.min_values[mass_param]) / \
+            (self.max_values[mass_param] - self.min_values[mass_param])
+        fy = (self.parameters[metallicity_param] - self.min_values[metallicity_param]) / \
+            (self.max_values[metallicity_param] - self.min_values[metallicity_param])
+        x = self.overlay_rect.x + fx * self.overlay_rect.width
+        y = self.overlay_rect.y + fy * self.overlay_rect.height
+        pygame.draw.circle(layer, (255, 255, 255), (int(x), int(y)), 5, 2)
\ No newline at end of file
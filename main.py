@@ -1,33 +1,100 @@
-import pygame
 import sys
-from pygame import mixer
-from star_simulation import StarSimulation
-from gui_elements import Timeline, ParameterControls
-from ai_predictor import StarPredictor
-from background import Background
-from data_visualizer import DataVisualizer  # Fixed import statement
+import time
+import argparse
 import random
-import imageio  # Replace cv2 import with imageio
-# Remove cv2 import
+import threading
+from contextlib import contextmanager
+from startup import StartupProfile
+
+# Cold-start cost per component, printed by --startup-profile. The predictor and the video
+# encoder are not imported here; they load on first use.
+startup = StartupProfile()
+with startup.phase("import pygame"):
+    import pygame
+with startup.phase("import simulation"):
+    from star_simulation import StarSimulation, STAGES
+    from background import Background
+    from cluster import StarCluster, STAGE_COLORS, REMNANT_COLORS
+    from ai_predictor import OUTCOME_NAMES
+with startup.phase("import ui"):
+    from gui_elements import Timeline, ParameterControls
+    from data_visualizer import DataVisualizer  # Fixed import statement
+    from ui_cache import RetainedSurface, render_text
+    from sim_clock import SimulationClock
+    from dirty_renderer import DirtyRectRenderer
+    from profiler import FrameProfiler
+    from quality import QualityController, KNOBS
+    from statelog import StateLogWriter
 
 class BetelgeuseSimulation:
-    def __init__(self):
-        pygame.init()
-        mixer.init()
+    def __init__(self, seed=None, particle_count=150, time_scale=1.0, dirty_rects=False, profile_path=None,
+                 profile_allocations=False, frame_budget=None, lod_knobs=KNOBS,
+                 cluster_size=2000, size=(1200, 800), audio=False, warm_predictor=False,
+                 startup_profile=None, startup_report=False, stream_address=None, stream_fps=30):
+        self.startup = startup_profile or StartupProfile()
+        self.startup_report = startup_report
+        self.deferred_loaded = set()
         
-        # Setup display
-        self.WIDTH = 1200
-        self.HEIGHT = 800
-        self.fullscreen = False
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        pygame.display.set_caption("Betelgeuse Life Cycle Simulation")
+        # Only the subsystems in use: pygame.init() would also open the audio device and probe joysticks
+        with self.startup.phase("display"):
+            pygame.display.init()
+            pygame.font.init()
+            
+            # Setup display
+            self.WIDTH, self.HEIGHT = size
+            self.fullscreen = False
+            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+            pygame.display.set_caption("Betelgeuse Life Cycle Simulation")
+        if audio:
+            with self.startup.phase("audio"):
+                pygame.mixer.init()
         
         # Initialize components
-        self.simulation = StarSimulation()
-        self.timeline = Timeline(self.WIDTH, self.HEIGHT)
-        self.controls = ParameterControls(self.WIDTH, self.HEIGHT)
-        self.predictor = StarPredictor()
-        self.background = Background(self.WIDTH, self.HEIGHT)
+        self.particle_count = particle_count
+        with self.startup.phase("star simulation"):
+            self.simulation = StarSimulation(particle_count, seed=seed)
+        with self.startup.phase("controls"):
+            self.timeline = Timeline(self.WIDTH, self.HEIGHT)
+            self.controls = ParameterControls(self.WIDTH, self.HEIGHT)
+        with self.startup.phase("background"):
+            self.background = Background(self.WIDTH, self.HEIGHT, seed=seed)
+        
+        # The predictor is built on first use (AI panel, outcome map, cluster), or warmed in a thread
+        self._predictor = None
+        self.predictor_lock = threading.Lock()
+        if warm_predictor:
+            threading.Thread(target=lambda: self.predictor, daemon=True).start()
+        
+        # Fixed-timestep clock: simulation speed no longer depends on the frame rate
+        self.sim_clock = SimulationClock(time_scale=time_scale)
+        self.step_count = 0  # Fixed steps run so far; drives the twinkle clock live and in replays
+        
+        # Optional dirty-rect presentation for kiosks: only changed regions are redrawn and sent to the
+        # display, and while the timeline is not playing the scene holds still so idle frames cost nothing
+        self.dirty_renderer = None
+        self.presented_view = None
+        self.presented_ai_panel = None
+        self.graphed_inputs = None
+        if dirty_rects:
+            self.dirty_renderer = DirtyRectRenderer((self.WIDTH, self.HEIGHT))
+        
+        # Per-stage frame timings; every mark is a no-op until profiling is enabled
+        self.profiler = FrameProfiler(track_allocations=profile_allocations)
+        self.profile_path = profile_path
+        if profile_path:
+            self.profiler.enable()
+        
+        # Optional adaptive level of detail holding frames within a time budget (ms)
+        self.quality = None
+        if frame_budget:
+            self.quality = QualityController(frame_budget, lod_knobs)
+        
+        # Cluster mode: a whole population on the same timeline instead of the single star
+        self.seed = seed
+        self.cluster_size = cluster_size
+        self.cluster = None
+        self.cluster_mode = False
+        self.cluster_panel = RetainedSurface(rle=True)
         
         # Colors
         self.BG_COLOR = (5, 5, 15)
@@ -45,7 +112,8 @@ class BetelgeuseSimulation:
         self.simulation.time = 0
         
         # Initialize visualizers
-        self.graphs = DataVisualizer(self.WIDTH, self.HEIGHT)
+        with self.startup.phase("graphs"):
+            self.graphs = DataVisualizer(self.WIDTH, self.HEIGHT)
         
         # Keyboard shortcut hints
         self.hints = [
@@ -53,15 +121,36 @@ class BetelgeuseSimulation:
             "Press 'I' - AI Analysis",
             "Press 'F' - Fullscreen",
             "Press 'R' - Reset",
-            "Press 'V' - Record Simulation"
-            "Press 'H' - Toggle Hints"
-            
+            "Press 'V' - Record Simulation",
+            "Press 'L' - Log State for Replay",
+            "Press 'H' - Toggle Hints",
+            "Press 'O' - Outcome Map",
+            "Press '[' / ']' - Time Scale",
+            "Press 'P' - Profiler",
+            "Press 'C' - Star Cluster"
         ]
         
         # Add recording settings
+        # Retained UI panels, re-rendered only when their text changes
+        self.hints_panel = RetainedSurface(rle=True)
+        self.ai_panel = RetainedSurface()
+        
         self.is_recording = False
-        self.recording_frames = []
+        self.recorder = None
         self.video_count = 0
+        
+        # Optional MJPEG endpoint serving the composited frame to other displays and browsers
+        self.stream = None
+        if stream_address:
+            with self.startup.phase("stream server"):
+                from stream import FrameStreamServer
+                self.stream = FrameStreamServer((self.WIDTH, self.HEIGHT), *stream_address, fps=stream_fps)
+            print(f"Streaming frames at {self.stream.url}")
+        
+        # State-level recording: a few KB of inputs per run, re-rendered later by replay.py
+        self.state_log = None
+        self.state_log_count = 0
+        self.stepped_time = None  # Simulation time after the last step, to spot jumps (reset, scrubbing)
 
     def start_recording(self):
         # Set random parameters
@@ -72,24 +161,140 @@ class BetelgeuseSimulation:
         self.timeline.auto_play = True
         self.show_ai_analysis = True
         self.is_recording = True
-        self.recording_frames = []
+        
+        # Stream frames to the encoder instead of buffering the whole run in RAM
+        if self.recorder is not None:
+            self.save_recording()
+        filename = f"simulation_recording_{self.video_count}.mp4"
+        with self.deferred_load("video encoder"):
+            from recorder import StreamingRecorder  # imageio and its ffmpeg plugin
+        self.recorder = StreamingRecorder(filename, self.screen.get_size(), fps=30)
+
+    @property
+    def predictor(self):
+        with self.predictor_lock:
+            if self._predictor is None:
+                with self.deferred_load("predictor"):
+                    from ai_predictor import StarPredictor
+                    self._predictor = StarPredictor()
+        return self._predictor
+
+    @contextmanager
+    def deferred_load(self, name):
+        # Times a component's first use; with --startup-profile the cost is reported when it happens
+        if name in self.deferred_loaded:
+            yield
+            return
+        self.deferred_loaded.add(name)
+        with self.startup.phase(f"{name} (on first use)") as timing:
+            yield
+        if self.startup_report:
+            print(f"Loaded {name} on first use in {timing['ms']:.1f} ms")
 
     def save_recording(self):
-        if not self.recording_frames:
+        if self.recorder is None:
             return
             
-        # Save using imageio instead of cv2
-        filename = f"simulation_recording_{self.video_count}.mp4"
-        imageio.mimsave(filename, self.recording_frames, fps=30)
+        recorder = self.recorder
+        self.recorder = None
+        result = recorder.close()  # Reports dropped frames and encoder failures itself
         
         self.video_count += 1
-        self.recording_frames = []
-        print(f"Video saved as {filename}")
+        if result['error'] is None:
+            print(f"Video saved as {result['filename']}")
+
+    def toggle_state_log(self):
+        if self.state_log is None:
+            self.start_state_log(f"simulation_state_{self.state_log_count}.jsonl.gz")
+        else:
+            self.stop_state_log()
+
+    def start_state_log(self, path):
+        # Rebuild the seeded components from a fresh seed so a replay starts from identical state
+        self.seed = random.randrange(2**31)
+        current_time = self.simulation.time
+        self.simulation = StarSimulation(self.particle_count, seed=self.seed)
+        self.simulation.time = current_time
+        background = Background(self.WIDTH, self.HEIGHT, seed=self.seed)
+        background.set_view(self.background.camera_x, self.background.camera_y, self.background.zoom)
+        background.nebula = self.background.nebula  # Same fixed scenery; keeps the tiles baked so far
+        self.background = background
+        self.graphs = DataVisualizer(self.WIDTH, self.HEIGHT)
+        self.cluster = None
+        if self.cluster_mode:
+            self.cluster = StarCluster(self.predictor, self.cluster_size, seed=self.seed)
+        if self.quality is not None:
+            self.apply_quality()
+        self.stepped_time = None
+        
+        self.state_log = StateLogWriter(path, {
+            'seed': self.seed,
+            'particles': self.particle_count,
+            'cluster_size': self.cluster_size,
+            'step_rate': self.step_rate(),
+            'start_step': self.step_count
+        })
+        print(f"Logging simulation state to {path}")
+
+    def step_rate(self):
+        return round(1 / self.sim_clock.step)
+
+    def stop_state_log(self):
+        state_log = self.state_log
+        self.state_log = None
+        state_log.close()
+        self.state_log_count += 1
+        print(f"State log saved as {state_log.path} ({state_log.steps} steps); render it with replay.py")
+
+    def replay_state(self):
+        # Every input update_frame and draw_frame depend on; auto-play time is derived, not logged
+        playing = self.timeline.auto_play and not self.paused
+        jumped = self.stepped_time is None or self.simulation.time != self.stepped_time
+        return {
+            'auto_play': self.timeline.auto_play,
+            'paused': self.paused,
+            'current_time': None if playing else self.timeline.current_time,
+            'time_jump': self.simulation.time if jumped else None,
+            'mass': self.controls.parameters["Mass (Solar Masses)"],
+            'metallicity': self.controls.parameters["Metallicity"],
+            'camera': [self.background.camera_x, self.background.camera_y, self.background.zoom],
+            'time_scale': self.sim_clock.time_scale,
+            'graphs': self.show_graphs,
+            'ai_analysis': self.show_ai_analysis,
+            'hints': self.show_hints,
+            'cluster': self.cluster_mode,
+            'outcome_map': self.controls.outcome_overlay is not None
+        }
+
+    def apply_replay_state(self, state):
+        self.timeline.auto_play = state['auto_play']
+        self.paused = state['paused']
+        if state['current_time'] is not None:
+            self.timeline.current_time = state['current_time']
+        if state['time_jump'] is not None:
+            self.simulation.time = state['time_jump']
+        self.controls.parameters["Mass (Solar Masses)"] = state['mass']
+        self.controls.parameters["Metallicity"] = state['metallicity']
+        self.background.set_view(*state['camera'])
+        self.sim_clock.time_scale = state['time_scale']
+        self.show_graphs = state['graphs']
+        self.show_ai_analysis = state['ai_analysis']
+        self.show_hints = state['hints']
+        if state['cluster'] != self.cluster_mode:
+            self.toggle_cluster()
+        if state['outcome_map'] != (self.controls.outcome_overlay is not None):
+            self.toggle_outcome_map()
 
     def run(self):
         running = True
         clock = pygame.time.Clock()
+        profiler = self.profiler
+        first_frame = True
+        # Nebula tiles bake on a worker thread from here on, so no frame waits for one
+        self.background.nebula.start_baking(self.background.zoom)
         while running:
+            frame_start = time.perf_counter()
+            profiler.start_frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -104,6 +309,18 @@ class BetelgeuseSimulation:
                         self.show_ai_analysis = not self.show_ai_analysis
                     elif event.key == pygame.K_h:
                         self.show_hints = not self.show_hints
+                    elif event.key == pygame.K_o:
+                        self.toggle_outcome_map()
+                    elif event.key == pygame.K_c:
+                        self.toggle_cluster()
+                    elif event.key == pygame.K_p:
+                        profiler.toggle_overlay()
+                        if not profiler.show_overlay and not self.profile_path:
+                            profiler.enable(False)
+                    elif event.key == pygame.K_LEFTBRACKET:
+                        self.sim_clock.scale_time(0.5)
+                    elif event.key == pygame.K_RIGHTBRACKET:
+                        self.sim_clock.scale_time(2)
                     elif event.key == pygame.K_SPACE:
                         self.paused = not self.paused
                     elif event.key == pygame.K_r:
@@ -114,44 +331,28 @@ class BetelgeuseSimulation:
                         self.background.apply_zoom(0.9)
                     if event.key == pygame.K_v:  # Add 'V' key to start recording
                         self.start_recording()
+                    elif event.key == pygame.K_l:
+                        self.toggle_state_log()
                 
                 self.timeline.handle_event(event)
                 self.controls.handle_event(event)
+            profiler.mark('events')
             
-            # Update simulation based on timeline and controls
-            if self.timeline.auto_play and not self.paused:
-                self.simulation.time = min(12, self.simulation.time + 0.01)
-                self.timeline.current_time = self.simulation.time
-            else:
-                self.simulation.time = self.timeline.current_time
-            
-            # Update simulation parameters
-            self.simulation.mass = self.controls.parameters["Mass (Solar Masses)"]
-            self.simulation.metallicity = self.controls.parameters["Metallicity"]
-            
-            # Clear screen and draw components
-            self.screen.fill(self.BG_COLOR)
-            self.background.update()
-            self.background.draw(self.screen)
-            self.simulation.update()
-            self.simulation.draw(self.screen)
-            
-            # Draw UI elements
-            self.timeline.draw(self.screen)
-            self.controls.draw(self.screen)
-            
-            # Draw graphs if enabled
-            if self.show_graphs:
-                self.graphs.update(self.simulation)
-                self.graphs.draw(self.screen)
-            
-            # Draw AI analysis if enabled
-            if self.show_ai_analysis:
-                self.draw_ai_analysis()
-            
-            # Draw keyboard hints
-            if self.show_hints:
-                self.draw_hints()
+            # Run as many fixed steps as real time calls for, then draw the interpolated state
+            for _ in range(self.sim_clock.advance(clock.get_time() / 1000)):
+                if self.state_log is not None:
+                    self.state_log.record(self.replay_state())
+                self.update_frame(ticks=int(self.step_count * 1000 / self.step_rate()))
+                self.step_count += 1
+            self.simulation.set_interpolation(1.0 if self.holding_still() else self.sim_clock.alpha)
+            profiler.mark('update')
+            self.present_frame()
+            profiler.mark('present')
+            if first_frame:
+                first_frame = False
+                self.startup.record("first frame", (time.perf_counter() - frame_start) * 1000)
+                if self.startup_report:
+                    print(self.startup.report())
             
             # Handle recording (in the main loop)
             if self.is_recording:
@@ -160,44 +361,167 @@ class BetelgeuseSimulation:
                     self.timeline.auto_play = False
                     self.save_recording()
                 else:
-                    # Capture frame using pygame's surface
-                    frame_data = pygame.surfarray.array3d(self.screen)
-                    frame_data = frame_data.swapaxes(0, 1)
-                    self.recording_frames.append(frame_data)
+                    # Hand the frame to the background encoder
+                    self.recorder.capture(self.screen)
+            profiler.mark('recording')
+            
+            # Hand the frame to the stream encoder (skipped when nobody is watching)
+            if self.stream is not None:
+                self.stream.capture(self.screen)
+                profiler.mark('streaming')
+            
+            # Busy time only; the frame-pacing wait below is headroom, not cost
+            if self.quality is not None:
+                if self.quality.record((time.perf_counter() - frame_start) * 1000):
+                    self.apply_quality()
             
-            pygame.display.flip()
             clock.tick(60)
+            profiler.mark('idle')
+            profiler.end_frame()
             
+        if self.is_recording:
+            self.save_recording()
+        if self.state_log is not None:
+            self.stop_state_log()
+        if self.stream is not None:
+            self.stream.close()
+        if self.profile_path:
+            frames = profiler.export(self.profile_path)
+            print(f"Frame timings for {frames} frames written to {self.profile_path}")
         pygame.quit()
         sys.exit()
 
+    def update_frame(self, ticks=None):
+        # Update simulation based on timeline and controls
+        if self.timeline.auto_play and not self.paused:
+            self.simulation.time = min(12, self.simulation.time + 0.01)
+            self.timeline.current_time = self.simulation.time
+        else:
+            self.simulation.time = self.timeline.current_time
+        
+        # Update simulation parameters
+        self.simulation.mass = self.controls.parameters["Mass (Solar Masses)"]
+        self.simulation.metallicity = self.controls.parameters["Metallicity"]
+        
+        # A still kiosk freezes particle flicker, ejecta and twinkle, and only graphs changed inputs
+        still = self.holding_still()
+        if not still:
+            self.background.update(ticks)
+        self.simulation.animate = not still
+        self.simulation.update()
+        if self.cluster_mode:
+            self.cluster.update(self.simulation.time)
+        if self.show_graphs:
+            inputs = (self.simulation.time, self.simulation.mass, self.simulation.metallicity)
+            if not still or inputs != self.graphed_inputs:
+                self.graphs.update(self.simulation)
+                self.graphed_inputs = inputs
+        self.stepped_time = self.simulation.time
+
+    def holding_still(self):
+        return self.dirty_renderer is not None and not (self.timeline.auto_play and not self.paused)
+
+    def draw_frame(self):
+        # Clear screen and draw components (the background layer already includes the fill)
+        profiler = self.profiler
+        self.background.draw(self.screen, self.BG_COLOR)
+        profiler.mark('background')
+        if self.cluster_mode:
+            self.cluster.draw(self.screen, self.background.camera_x, self.background.camera_y, self.background.zoom)
+            self.draw_cluster_summary()
+        else:
+            self.simulation.draw(self.screen)
+        profiler.mark('simulation')
+        
+        # Draw UI elements
+        self.timeline.draw(self.screen)
+        self.controls.draw(self.screen)
+        profiler.mark('ui')
+        
+        # Draw graphs if enabled
+        if self.show_graphs:
+            self.graphs.draw(self.screen)
+            profiler.mark('graphs')
+        
+        # Draw AI analysis if enabled
+        if self.show_ai_analysis:
+            self.draw_ai_analysis()
+            profiler.mark('ai_analysis')
+        
+        # Draw keyboard hints
+        if self.show_hints:
+            self.draw_hints()
+            profiler.mark('hints')
+        
+        if profiler.show_overlay:
+            profiler.draw(self.screen)
+            profiler.mark('profiler')
+
+    def present_frame(self):
+        if self.dirty_renderer is None:
+            self.draw_frame()
+            pygame.display.flip()
+            return
+        self.dirty_renderer.present(self.screen, self.draw_frame, self.collect_dirty_rects())
+
+    def collect_dirty_rects(self):
+        # Every component reports (and forgets) what it changed; None asks for a full redraw
+        rects = self.background.dirty_rects()
+        if self.cluster_mode:
+            camera = (self.background.camera_x, self.background.camera_y, self.background.zoom)
+            rects += self.cluster.dirty_rects(self.screen.get_size(), camera)
+        else:
+            rects += self.simulation.dirty_rects(self.screen.get_size())
+        rects += self.timeline.dirty_rects()
+        rects += self.controls.dirty_rects()
+        if self.show_graphs:
+            rects += self.graphs.dirty_rects()
+        if self.show_ai_analysis:
+            content = self._ai_analysis_content()
+            if content != self.presented_ai_panel:
+                self.presented_ai_panel = content
+                rects.append(pygame.Rect(self.WIDTH - 620, 20, 600, 650))
+        if self.profiler.show_overlay:
+            rects += self.profiler.dirty_rects(self.screen.get_size())
+        
+        # Toggling a panel or switching display mode changes the layout
+        view = (self.show_graphs, self.show_ai_analysis, self.show_hints, tuple(self.hints),
+                self.profiler.show_overlay, self.cluster_mode, self.screen)
+        if view != self.presented_view:
+            self.presented_view = view
+            return None
+        return rects
+
     def draw_hints(self):
-        font = pygame.font.Font(None, 24)
-        y = 10
-        for hint in self.hints:
-            text = font.render(hint, True, (200, 200, 250))
-            self.screen.blit(text, (10, y))
+        panel = self.hints_panel.get(tuple(self.hints), self._render_hints)
+        self.screen.blit(panel, (10, 10))
+
+    def _render_hints(self):
+        lines = [render_text(hint, 24, (200, 200, 250)) for hint in self.hints]
+        panel = pygame.Surface((max(line.get_width() for line in lines), 25 * len(lines)), pygame.SRCALPHA)
+        y = 0
+        for text in lines:
+            # Copy text pixels as-is so antialiased edges are not darkened twice
+            panel.blit(text, (0, y), special_flags=pygame.BLEND_RGBA_MAX)
             y += 25
+        return panel
 
     def draw_ai_analysis(self):
-        font = pygame.font.Font(None, 24)
-        title_font = pygame.font.Font(None, 32)
-        padding = 20
-        line_height = 23  # Reduced line height
-        
-        # Create analysis surface with increased height
-        analysis_surface = pygame.Surface((600, 650), pygame.SRCALPHA)
-        pygame.draw.rect(analysis_surface, (20, 20, 40, 200), (0, 0, 600, 650))
+        title, texts = self._ai_analysis_content()
         
+        # The panel only re-renders when one of its lines changes
+        panel = self.ai_panel.get((title, texts), lambda: self._render_ai_analysis(title, texts))
+        self.screen.blit(panel, (self.WIDTH - 620, 20))
+
+    def _ai_analysis_content(self):
         # Get AI prediction and actual simulation values
         prediction = self.predictor.predict_final_stage(
             self.simulation.mass,
             self.simulation.metallicity
         )
         
-        # Get current values from the graphs data
-        current_temp = self.graphs.data['Temperature (K)'][-1] if self.graphs.data['Temperature (K)'] else 0
-        current_lum = self.graphs.data['Luminosity (Solar)'][-1] if self.graphs.data['Luminosity (Solar)'] else 0
+        # Current values are indexed from the evolution track (available with or without graphs)
+        state = self.simulation.state
         
         # Determine star name
         if self.simulation.mass > 40:
@@ -212,19 +536,18 @@ class BetelgeuseSimulation:
             star_name = "Deneb-class Supergiant"
         else:
             star_name = "Antares-class Red Giant"
-            
-        # Add star name at the top
-        star_title = title_font.render(f"Star Classification: {star_name}", True, (255, 220, 100))
-        analysis_surface.blit(star_title, (padding, padding))
+        title = f"Star Classification: {star_name}"
         
         # Now create texts list with actual simulation data
-        texts = [
+        texts = (
             "",
             "Stellar Evolution Analysis:",
-            f"Current Mass: {self.simulation.mass:.1f} M☉",
+            f"Current Mass: {state['mass']:.1f} M☉ (initial {self.simulation.mass:.1f})",
             f"Metallicity (Z): {self.simulation.metallicity:.3f}",
-            f"Surface Temperature: {current_temp:,.0f} K",
-            f"Luminosity: {current_lum:.1f} L☉",
+            f"Surface Temperature: {state['temperature']:,.0f} K",
+            f"Luminosity: {state['luminosity']:,.1f} L☉",
+            f"Radius: {state['radius']:,.1f} R☉",
+            f"Mass Loss: {state['mass_loss_rate']:.2f} M☉ per billion years",
             f"Current Stage: {self.simulation.current_stage}",
             "",
             "Neural Network Prediction:",
@@ -241,7 +564,19 @@ class BetelgeuseSimulation:
             f"- ROC-AUC: {0.97 - (self.simulation.metallicity/10):.3f}",
             "",
             "Press 'I' to close"
-        ]
+        )
+        return title, texts
+
+    def _render_ai_analysis(self, title, texts):
+        padding = 20
+        line_height = 23  # Reduced line height
+        
+        # Create analysis surface with increased height
+        analysis_surface = pygame.Surface((600, 650), pygame.SRCALPHA)
+        pygame.draw.rect(analysis_surface, (20, 20, 40, 200), (0, 0, 600, 650))
+        
+        # Add star name at the top
+        analysis_surface.blit(render_text(title, 32, (255, 220, 100)), (padding, padding))
         
         # Draw text with different colors for sections
         colors = {
@@ -250,19 +585,59 @@ class BetelgeuseSimulation:
             "Technical Details:": (200, 255, 100)
         }
         
-        # Draw text with adjusted position and smaller gaps
+        # Draw text with adjusted position and smaller gaps (unchanged lines come from the text cache)
         y_offset = padding
-        for i, text in enumerate(texts):
+        for text in texts:
             color = colors.get(text, (200, 200, 250))
-            text_surface = font.render(text, True, color)
-            analysis_surface.blit(text_surface, (padding, y_offset))
+            analysis_surface.blit(render_text(text, 24, color), (padding, y_offset))
             # Add extra space after section headers
             if text in colors:
                 y_offset += line_height + 5
             else:
                 y_offset += line_height
         
-        self.screen.blit(analysis_surface, (self.WIDTH - 620, 20))
+        return analysis_surface
+
+    def apply_quality(self):
+        settings = self.quality.settings()
+        self.simulation.set_detail(settings)
+
+    def toggle_cluster(self):
+        # Built on first use: sampling and batch prediction take a moment for large clusters
+        if self.cluster is None:
+            self.cluster = StarCluster(self.predictor, self.cluster_size, seed=self.seed)
+        self.cluster_mode = not self.cluster_mode
+        if self.cluster_mode:
+            self.cluster.update(self.simulation.time)
+
+    def draw_cluster_summary(self):
+        stages = tuple(self.cluster.stage_counts().tolist())
+        remnants = tuple(self.cluster.remnant_counts().tolist())
+        panel = self.cluster_panel.get((stages, remnants), lambda: self._render_cluster_summary(stages, remnants))
+        self.screen.blit(panel, (self.WIDTH - 240, 20))  # Right of the sliders
+
+    def _render_cluster_summary(self, stages, remnants):
+        # Counts per stage, then the predicted remnants of the stars that have ended
+        lines = [(f"Cluster: {self.cluster.count:,} stars", (255, 220, 100))]
+        for stage, count, color in zip(STAGES, stages, STAGE_COLORS):
+            lines.append((f"{stage.value}: {count:,}", color))
+        lines.append((f"{STAGES[-1].value}: {stages[-1]:,}", (200, 200, 250)))
+        for name, count, color in zip(OUTCOME_NAMES, remnants, REMNANT_COLORS):
+            lines.append((f"  {name}: {count:,}", color))
+        panel = pygame.Surface((230, 22 * len(lines) + 16), pygame.SRCALPHA)
+        pygame.draw.rect(panel, (20, 20, 40, 200), panel.get_rect())
+        for i, (text, color) in enumerate(lines):
+            # Lightened towards white so dark sprite colors stay readable
+            color = tuple((c + 255) // 2 for c in color)
+            panel.blit(render_text(text, 22, color), (10, 8 + 22 * i))
+        return panel
+
+    def toggle_outcome_map(self):
+        # Rasterized once per overlay size by the predictor's batch API, then cached
+        if self.controls.outcome_overlay is None:
+            self.controls.set_outcome_map(self.predictor.outcome_map(*self.controls.overlay_rect.size))
+        else:
+            self.controls.set_outcome_map(None)
 
     def toggle_fullscreen(self):
         self.fullscreen = not self.fullscreen
@@ -271,9 +646,51 @@ class BetelgeuseSimulation:
         else:
             self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
 
+def _parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Betelgeuse Life Cycle Simulation")
+    parser.add_argument("--particles", type=int, default=150, metavar="N",
+                        help="number of star particles (batches past 20,000 are drawn as dots)")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw only changed screen regions and hold still while paused (for kiosk displays)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="record per-stage frame timings and write them to PATH on exit (.csv or .json)")
+    parser.add_argument("--profile-allocations", action="store_true",
+                        help="also count net allocated blocks per stage while profiling")
+    parser.add_argument("--cluster", type=int, metavar="N",
+                        help="start in star-cluster mode with N stars (toggle with C)")
+    parser.add_argument("--state-log", metavar="PATH",
+                        help="log simulation inputs to PATH (.jsonl or .jsonl.gz) for replay.py; toggle later with L")
+    parser.add_argument("--frame-budget", type=float, metavar="MS",
+                        help="adapt rendering detail to keep frames under MS milliseconds (e.g. 16.6)")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print import and init time per component once the first frame is shown")
+    parser.add_argument("--warm-predictor", action="store_true",
+                        help="load the outcome predictor in a background thread instead of on first use")
+    parser.add_argument("--audio", action="store_true", help="initialize the audio mixer (off by default)")
+    parser.add_argument("--stream", type=_parse_address, metavar="[HOST:]PORT",
+                        help="serve the frames as MJPEG over HTTP, e.g. 8080 or 0.0.0.0:8080")
+    parser.add_argument("--stream-fps", type=int, default=30, help="frame rate sent to stream viewers")
+    parser.add_argument("--lod-knobs", default=",".join(KNOBS),
+                        help=f"comma-separated detail settings the budget may lower (default: {','.join(KNOBS)})")
+    args = parser.parse_args()
     try:
-        app = BetelgeuseSimulation()
+        app = BetelgeuseSimulation(particle_count=args.particles, dirty_rects=args.dirty_rects,
+                                   profile_path=args.profile,
+                                   profile_allocations=args.profile_allocations,
+                                   frame_budget=args.frame_budget,
+                                   lod_knobs=[knob for knob in args.lod_knobs.split(",") if knob],
+                                   cluster_size=args.cluster or 2000, audio=args.audio,
+                                   warm_predictor=args.warm_predictor, startup_profile=startup,
+                                   startup_report=args.startup_profile, stream_address=args.stream,
+                                   stream_fps=args.stream_fps)
+        if args.cluster:
+            app.toggle_cluster()
+        if args.state_log:
+            app.start_state_log(args.state_log)
         app.run()
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,186 @@
+from collections import deque
+import hashlib
+import json
+import math
+import os
+import threading
+import numpy as np
+
+NEBULA_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Pre-baked resolutions, in texels per world unit; Background.apply_zoom keeps zoom within [0.5, 2]
+ZOOM_LEVELS = (0.5, 0.75, 1.0, 1.5, 2.0)
+
+# Additive cloud color by density: dark blue wisps thickening into violet and rose cores
+_RAMP_STOPS = np.array([0, 40, 120, 200, 255])
+_RAMP_COLORS = np.array([(0, 0, 0), (6, 6, 22), (20, 16, 52), (40, 22, 70), (66, 32, 84)])
+NEBULA_RAMP = np.column_stack([np.interp(np.arange(256), _RAMP_STOPS, _RAMP_COLORS[:, c])
+                               for c in range(3)]).astype(np.int32)
+
+def value_noise(u, v, lattice):
+    # Smoothstep-interpolated lattice values; u and v are in lattice cells and wrap at its size
+    cells = lattice.shape[0]
+    x0 = np.floor(u)
+    y0 = np.floor(v)
+    fx = u - x0
+    fy = v - y0
+    fx = fx * fx * (3 - 2 * fx)
+    fy = fy * fy * (3 - 2 * fy)
+    x0 = x0.astype(np.int64) % cells
+    y0 = y0.astype(np.int64) % cells
+    x1 = (x0 + 1) % cells
+    y1 = (y0 + 1) % cells
+    top = lattice[y0, x0] + (lattice[y0, x1] - lattice[y0, x0]) * fx
+    bottom = lattice[y1, x0] + (lattice[y1, x1] - lattice[y1, x0]) * fx
+    return top + (bottom - top) * fy
+
+def fbm(u, v, seed, octaves, base_cells, period, persistence=0.5):
+    # Sum of value-noise octaves, each twice as fine and half as strong; repeats every `period` world units.
+    # `seed` is a sequence of ints, so independent fields can share a base seed
+    total = np.zeros_like(u)
+    amplitude = 1.0
+    norm = 0.0
+    for octave in range(octaves):
+        cells = base_cells * 2 ** octave
+        lattice = np.random.default_rng([*seed, octave]).random((cells, cells), dtype=np.float32)
+        total += amplitude * value_noise(u * (cells / period), v * (cells / period), lattice)
+        norm += amplitude
+        amplitude *= persistence
+    return total / norm
+
+class NebulaTextures:
+    # Cloud density per zoom level, baked tile by tile into memory-mapped files and reused across launches
+    def __init__(self, seed, cache_dir=None, tile_size=256, period=2048, octaves=6, levels=ZOOM_LEVELS):
+        self.seed = seed
+        self.cache_dir = cache_dir or os.environ.get('BETELGEUSE_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.tile_size = tile_size
+        self.period = period  # World units before the nebula repeats (it tiles the infinite sky)
+        self.octaves = octaves
+        self.levels = levels
+        self.tiles = {}  # level -> (tile array, baked flags), opened on first use
+        self.open_lock = threading.Lock()
+        self.baked_tiles = 0
+
+        # Background baking: without it view() bakes what it needs inline, which headless renders rely on
+        self.baker = None
+        self.requests = []  # Tiles the current view is waiting on, baked before the rest
+        self.requests_lock = threading.Lock()
+
+    def config_hash(self):
+        payload = json.dumps({'format': NEBULA_FORMAT_VERSION, 'seed': self.seed, 'tile_size': self.tile_size,
+                              'period': self.period, 'octaves': self.octaves}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def level_for(self, zoom):
+        # Nearest pre-baked level, measured as a scale ratio
+        return min(self.levels, key=lambda level: abs(math.log(zoom / level)))
+
+    def _level(self, level):
+        with self.open_lock:
+            return self.tiles.get(level) or self._open(level)
+
+    def _open(self, level):
+        # One file of tiles plus one of 'baked' flags per level; missing files start out all unbaked
+        tiles_per_side = int(self.period * level) // self.tile_size
+        shape = (tiles_per_side, tiles_per_side)
+        base = os.path.join(self.cache_dir, f"nebula-v{NEBULA_FORMAT_VERSION}-{self.config_hash()}-{int(level * 100)}")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tiles = self._map(f"{base}.npy", shape + (self.tile_size, self.tile_size))
+            baked = self._map(f"{base}-baked.npy", shape)
+        except (OSError, ValueError):
+            # Read-only or broken cache directory: bake into memory for this run only
+            tiles = np.zeros(shape + (self.tile_size, self.tile_size), dtype=np.uint8)
+            baked = np.zeros(shape, dtype=np.uint8)
+        self.tiles[level] = (tiles, baked)
+        return tiles, baked
+
+    @staticmethod
+    def _map(path, shape):
+        if not os.path.exists(path):
+            # Create then rename so a concurrent start never maps a partial header
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            created = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=shape)
+            del created
+            os.replace(tmp_path, path)
+        array = np.lib.format.open_memmap(path, mode='r+')
+        if array.dtype != np.uint8 or array.shape != shape:
+            raise ValueError(f"Unexpected nebula cache layout in {path}")
+        return array
+
+    def _bake(self, level, tx, ty):
+        # Texel centers in world units, rows along y
+        t = self.tile_size
+        u, v = np.meshgrid((tx * t + np.arange(t, dtype=np.float32) + 0.5) / level,
+                           (ty * t + np.arange(t, dtype=np.float32) + 0.5) / level)
+
+        # Domain warp: coarse noise bends the lookups into wisps and filaments
+        reach = self.period * 0.3
+        warp_u = fbm(u, v, [self.seed, 1], 3, 2, self.period) - 0.5
+        warp_v = fbm(u, v, [self.seed, 2], 3, 2, self.period) - 0.5
+        density = fbm(u + warp_u * reach, v + warp_v * reach, [self.seed, 0], self.octaves, 4, self.period)
+
+        # Thin gas clears out entirely; dense regions ease into bright cores
+        clouds = np.clip((density - 0.38) / 0.4, 0, 1) ** 1.6
+        return (clouds * 255).astype(np.uint8)
+
+    def _bake_tile(self, level, tx, ty):
+        tiles, baked = self._level(level)
+        if not baked[ty, tx]:
+            tiles[ty, tx] = self._bake(level, tx, ty)
+            baked[ty, tx] = 1  # Flag after the data, so an interrupted bake is redone
+            self.baked_tiles += 1
+
+    def start_baking(self, zoom=1.0):
+        # Bake every level on a worker thread, nearest to `zoom` first; view() then never bakes inline
+        if self.baker is not None:
+            return
+        order = deque()
+        for level in sorted(self.levels, key=lambda level: abs(math.log(zoom / level))):
+            tiles, baked = self._level(level)
+            order.extend((level, tx, ty) for ty, tx in np.argwhere(baked == 0).tolist())
+        self.baker = threading.Thread(target=self._bake_loop, args=(order,), daemon=True)
+        self.baker.start()
+
+    def _bake_loop(self, order):
+        while True:
+            with self.requests_lock:
+                job = self.requests.pop(0) if self.requests else None
+            if job is None:
+                if not order:
+                    break
+                job = order.popleft()
+            self._bake_tile(*job)
+
+    def view(self, width, height, camera_x, camera_y, zoom):
+        # Density for every screen pixel as a (height, width) array, sampled nearest from the closest level.
+        # Also returns whether that level was used; while it is still baking in the background the
+        # nearest fully baked level stands in, or empty sky if none covers the view yet.
+        wanted = self.level_for(zoom)
+        for level in sorted(self.levels, key=lambda level: abs(math.log(zoom / level))):
+            tiles, baked = self._level(level)
+            size = tiles.shape[0] * self.tile_size
+
+            # Screen pixel centers -> world -> texels of this level (wrapping at the period)
+            texel_x = np.floor(((np.arange(width) + 0.5) / zoom - camera_x) * level).astype(np.int64) % size
+            texel_y = np.floor(((np.arange(height) + 0.5) / zoom - camera_y) * level).astype(np.int64) % size
+            row_tile, row = np.divmod(texel_y, self.tile_size)
+            col_tile = texel_x // self.tile_size
+            needed = [(level, tile_x, tile_y) for tile_y in np.unique(row_tile).tolist()
+                      for tile_x in np.unique(col_tile).tolist() if not baked[tile_y, tile_x]]
+
+            if self.baker is None:
+                # Bake whatever the view touches that no earlier run has
+                for job in needed:
+                    self._bake_tile(*job)
+            elif needed:
+                if level == wanted:
+                    with self.requests_lock:
+                        self.requests = needed
+                continue
+
+            # Separable gather: whole texel rows first, then the columns out of them
+            rows = tiles[row_tile, :, row, :].reshape(height, size)
+            return rows[:, texel_x], level == wanted
+        return np.zeros((height, width), dtype=np.uint8), False
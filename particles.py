@@ -0,0 +1,50 @@
+import numpy as np
+
+class ParticleSystem:
+    def __init__(self, count, star_size, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.count = count
+
+        # Struct-of-arrays particle store
+        self.angle = np.zeros(count, dtype=np.float32)
+        self.previous_angle = np.zeros(count, dtype=np.float32)  # For interpolating between steps
+        self.speed = np.zeros(count, dtype=np.float32)
+        self.distance = np.zeros(count, dtype=np.float32)
+        self.size = np.zeros(count, dtype=np.float32)
+        self.opacity = np.zeros(count, dtype=np.float32)
+        self.color_index = np.zeros(count, dtype=np.int32)
+
+        self.respawn(np.arange(count), star_size)
+
+    def respawn(self, indices, star_size):
+        n = len(indices)
+        self.angle[indices] = self.rng.uniform(0, 2 * np.pi, n)
+        self.previous_angle[indices] = self.angle[indices]  # Respawned particles don't sweep
+        self.speed[indices] = self.rng.uniform(0.5, 2, n)
+        self.distance[indices] = self.rng.uniform(star_size * 0.8, star_size * 2.5, n)
+        self.size[indices] = self.rng.uniform(2, 6, n)
+        self.opacity[indices] = self.rng.uniform(0.3, 1.0, n)
+
+    def update(self, angular_speed, star_size, palette_size, respawn_chance=0.01):
+        self.previous_angle[:] = self.angle
+        self.angle += self.speed * angular_speed
+        np.remainder(self.angle, 2 * np.pi, out=self.angle)  # Keep float32 angles precise over long runs
+
+        # Flicker: fresh opacity and palette color every step
+        self.opacity[:] = self.rng.uniform(0.3, 1.0, self.count)
+        self.color_index[:] = self.rng.integers(0, palette_size, self.count)
+
+        # Regenerate a random subset in one batch
+        respawned = np.flatnonzero(self.rng.random(self.count) < respawn_chance)
+        if respawned.size:
+            self.respawn(respawned, star_size)
+
+    def positions(self, center_x, center_y, alpha=1.0):
+        angle = self.angle
+        if alpha < 1.0:
+            # Shortest way round, since angles wrap at 2*pi
+            delta = np.remainder(self.angle - self.previous_angle + np.pi, 2 * np.pi) - np.pi
+            angle = self.previous_angle + delta * alpha
+        x = center_x + np.cos(angle) * self.distance
+        y = center_y + np.sin(angle) * self.distance
+        return x, y
@@ -0,0 +1,150 @@
+import csv
+import json
+import sys
+import time
+from collections import deque
+import numpy as np
+import pygame
+from ring_buffer import RingBuffer
+from ui_cache import render_text
+
+class FrameProfiler:
+    # Main-loop stages in display order; 'idle' is the frame-pacing wait and is not part of the frame cost
+    STAGES = ('events', 'update', 'background', 'simulation', 'ui', 'graphs', 'ai_analysis',
+              'hints', 'profiler', 'present', 'recording', 'streaming', 'idle')
+
+    def __init__(self, window=300, max_frames=36000, track_allocations=False, refresh_frames=30):
+        self.enabled = False
+        self.show_overlay = False
+        self.track_allocations = track_allocations  # Net allocated blocks per stage (sys.getallocatedblocks)
+
+        # Rolling window per stage for the overlay percentiles, in milliseconds
+        self.samples = {stage: RingBuffer(window) for stage in self.STAGES + ('frame',)}
+        # Full per-frame rows for export (oldest dropped past max_frames, about 10 minutes at 60 FPS)
+        self.frames = deque(maxlen=max_frames)
+        self.frame_index = 0
+
+        self.current = None
+        self.current_allocs = None
+        self.last_mark = 0.0
+        self.last_blocks = 0
+
+        # Overlay text is only recomputed every few frames
+        self.refresh_frames = refresh_frames
+        self.overlay_lines = ()
+        self.font_name = None
+        self.refreshed = False
+        self.presented_rect = None  # For dirty-rect rendering
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.current = None
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enable()
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.current = {}
+        self.current_allocs = {}
+        if self.track_allocations:
+            self.last_blocks = sys.getallocatedblocks()
+        self.last_mark = time.perf_counter()
+
+    def mark(self, stage):
+        # Charges the time since the previous mark to 'stage' (stages may repeat within a frame)
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[stage] = self.current.get(stage, 0.0) + (now - self.last_mark) * 1000
+        if self.track_allocations:
+            blocks = sys.getallocatedblocks()
+            self.current_allocs[stage] = self.current_allocs.get(stage, 0) + blocks - self.last_blocks
+            self.last_blocks = blocks
+        # Read the clock again so the profiler's own bookkeeping is not billed to the next stage
+        self.last_mark = time.perf_counter()
+
+    def end_frame(self):
+        if self.current is None:
+            return
+        timings = self.current
+        self.current = None
+        frame_ms = sum(ms for stage, ms in timings.items() if stage != 'idle')
+
+        row = {'frame': self.frame_index, 'frame_ms': frame_ms}
+        for stage in self.STAGES:
+            ms = timings.get(stage, 0.0)
+            self.samples[stage].append(ms)
+            row[f"{stage}_ms"] = ms
+        self.samples['frame'].append(frame_ms)
+        if self.track_allocations:
+            for stage in self.STAGES:
+                row[f"{stage}_allocs"] = self.current_allocs.get(stage, 0)
+        self.frames.append(row)
+
+        self.frame_index += 1
+        if self.show_overlay and self.frame_index % self.refresh_frames == 0:
+            self.overlay_lines = self._format_overlay()
+            self.refreshed = True
+
+    def percentiles(self):
+        # {stage: (p50, p95, p99)} over the rolling window, in milliseconds
+        stats = {}
+        for stage, buffer in self.samples.items():
+            if len(buffer):
+                stats[stage] = tuple(np.percentile(buffer.values(), (50, 95, 99)).tolist())
+        return stats
+
+    def _format_overlay(self):
+        stats = self.percentiles()
+        lines = [f"{'stage':<12}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for stage in ('frame',) + self.STAGES:
+            if stage in stats and (stage == 'frame' or stats[stage][2] > 0):
+                p50, p95, p99 = stats[stage]
+                lines.append(f"{stage:<12}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        return tuple(lines)
+
+    def overlay_rect(self, screen_size):
+        # Bottom-right, above the timeline; grows upwards with the number of lines
+        width, height = screen_size
+        panel_height = 18 * len(self.overlay_lines) + 10
+        return pygame.Rect(width - 330, height - 120 - panel_height, 310, panel_height)
+
+    def dirty_rects(self, screen_size):
+        # The overlay only changes when its text is refreshed; the old panel may have been taller
+        rect = self.overlay_rect(screen_size) if self.overlay_lines else None
+        if rect == self.presented_rect and not self.refreshed:
+            return []
+        rects = [r for r in (rect, self.presented_rect) if r is not None]
+        self.presented_rect = rect
+        self.refreshed = False
+        return rects
+
+    def draw(self, screen):
+        if not self.overlay_lines:
+            return
+        if self.font_name is None:
+            self.font_name = pygame.font.match_font('monospace')  # Looked up once; may hit fontconfig
+        rect = self.overlay_rect(screen.get_size())
+        pygame.draw.rect(screen, (10, 10, 25), rect)
+        y = rect.y + 5
+        for line in self.overlay_lines:
+            screen.blit(render_text(line, 20, (150, 255, 150), name=self.font_name), (rect.x + 8, y))
+            y += 18
+
+    def export(self, path):
+        # CSV (one row per frame) or JSON (frames plus summary percentiles), chosen by extension
+        rows = list(self.frames)
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'stages': list(self.STAGES), 'summary': self.percentiles(), 'frames': rows}, f)
+        else:
+            with open(path, 'w', newline='') as f:
+                fields = list(rows[0]) if rows else ['frame', 'frame_ms']
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
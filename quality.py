@@ -0,0 +1,78 @@
+# Only settings that lower the cost of every frame, not just of rebuilding a cached layer
+KNOBS = ('particles', 'glow_layers', 'supernova_effects')
+
+# Setting per knob at full quality (level 0) and at the lowest level
+KNOB_RANGES = {
+    'particles': (1.0, 0.25),  # Fraction of particles drawn
+    'glow_layers': (15, 5),  # Fewer rings also shrink the glow layer blitted each frame
+    'supernova_effects': (1.0, 0.3)  # Fraction of supernova ejecta rasterized
+}
+
+class QualityController:
+    def __init__(self, target_ms=1000 / 60, knobs=KNOBS, levels=4, smoothing=0.1,
+                 degrade_frames=10, recover_frames=90, headroom=0.7, settle_frames=5):
+        unknown = set(knobs) - set(KNOBS)
+        if unknown:
+            raise ValueError(f"Unknown quality knobs: {', '.join(sorted(unknown))}")
+        self.target_ms = target_ms
+        self.knobs = tuple(knobs)  # Knobs the controller may lower; the rest stay at full quality
+        self.levels = levels
+        self.level = 0
+        self.smoothing = smoothing
+        self.average_ms = None
+
+        # Degrade quickly when over budget, recover slowly once there is clear headroom
+        self.degrade_frames = degrade_frames
+        self.recover_frames = recover_frames
+        self.headroom = headroom
+        self.over_budget = 0
+        self.under_budget = 0
+        self.changes = 0
+
+        # Frames right after a change rebuild cached layers and would read as a spike
+        self.settle_frames = settle_frames
+        self.settling = 0
+
+    def record(self, frame_ms):
+        # Feed one frame's busy time; returns True when the quality level changed
+        if self.settling:
+            self.settling -= 1
+            return False
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * self.smoothing
+
+        if self.average_ms > self.target_ms:
+            self.over_budget += 1
+            self.under_budget = 0
+        elif self.average_ms < self.target_ms * self.headroom:
+            self.under_budget += 1
+            self.over_budget = 0
+        else:
+            self.over_budget = 0
+            self.under_budget = 0
+
+        if self.over_budget >= self.degrade_frames and self.level < self.levels:
+            return self._set_level(self.level + 1)
+        if self.under_budget >= self.recover_frames and self.level > 0:
+            return self._set_level(self.level - 1)
+        return False
+
+    def _set_level(self, level):
+        self.level = level
+        self.over_budget = 0
+        self.under_budget = 0
+        # Let the average settle on the new level before judging it
+        self.average_ms = None
+        self.settling = self.settle_frames
+        self.changes += 1
+        return True
+
+    def settings(self):
+        fraction = self.level / self.levels
+        settings = {}
+        for knob, (best, worst) in KNOB_RANGES.items():
+            value = best + (worst - best) * fraction if knob in self.knobs else best
+            settings[knob] = value if isinstance(best, float) else int(round(value))
+        return settings
@@ -0,0 +1,76 @@
+import threading
+import queue
+import numpy as np
+import pygame
+import imageio
+
+class StreamingRecorder:
+    def __init__(self, filename, size, fps=30, pool_size=4):
+        self.filename = filename
+        self.width, self.height = size
+        self.fps = fps
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.error = None
+
+        # Fixed pool of reused frame buffers, handed back by the encoder once written
+        self.free_buffers = queue.Queue()
+        for _ in range(pool_size):
+            self.free_buffers.put(np.empty((self.height, self.width, 3), dtype=np.uint8))
+        self.pending_frames = queue.Queue(maxsize=pool_size)
+
+        self.writer = imageio.get_writer(filename, fps=fps)
+        self.encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.encoder_thread.start()
+
+    def capture(self, surface, block=False):
+        # Offline renders block for a free buffer; the interactive loop never waits
+        try:
+            buffer = self.free_buffers.get(block=block)
+        except queue.Empty:
+            # Encoder is behind, drop this frame instead of stalling the render loop
+            self.dropped_frames += 1
+            return False
+
+        # Copy straight from the surface pixels into the pooled buffer (no per-frame allocation)
+        pixels = pygame.surfarray.pixels3d(surface)
+        buffer[...] = pixels.swapaxes(0, 1)
+        del pixels  # Unlock the surface
+
+        self.pending_frames.put(buffer)
+        self.frame_count += 1
+        return True
+
+    def _encode_loop(self):
+        while True:
+            buffer = self.pending_frames.get()
+            if buffer is None:
+                break
+            if self.error is None:
+                try:
+                    self.writer.append_data(buffer)
+                except Exception as e:
+                    self.error = e
+            self.free_buffers.put(buffer)
+
+    def close(self):
+        # Flush remaining frames, then finalize the file. Problems are reported, not raised,
+        # so a failed recording never ends the session; offline renders check 'error' themselves
+        self.pending_frames.put(None)
+        self.encoder_thread.join()
+        try:
+            self.writer.close()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+        if self.dropped_frames:
+            print(f"Recording dropped {self.dropped_frames} of {self.frame_count + self.dropped_frames} "
+                  f"frames (encoder fell behind)")
+        if self.error is not None:
+            print(f"Recording to {self.filename} failed: {self.error}")
+        return {
+            'filename': self.filename,
+            'frames': self.frame_count,
+            'dropped_frames': self.dropped_frames,
+            'error': self.error
+        }
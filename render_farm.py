@@ -0,0 +1,182 @@
+import os
+# Render off-screen; must be set before pygame initializes its display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import hashlib
+import multiprocessing
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pygame
+from main import BetelgeuseSimulation
+from recorder import StreamingRecorder
+
+SIM_END = 12
+TIME_STEP = 0.01  # Same simulated time per frame as the interactive auto-play
+FRAME_MS = 1000 / 60  # Twinkle advances as if running at 60 fps
+VIDEO_FPS = 30
+
+def frame_count():
+    return int(round(SIM_END / TIME_STEP))
+
+def frame_time(index):
+    return min(SIM_END, (index + 1) * TIME_STEP)
+
+def make_runs(count, base_seed=0, params=None, graphs=False, particles=150):
+    # Each run gets its own seed; missing parameters are sampled like the 'V' recording
+    runs = []
+    for i in range(count):
+        seed = base_seed + i
+        rng = random.Random(seed)
+        if params:
+            mass, metallicity = params[i % len(params)]
+        else:
+            mass = rng.uniform(8, 50)
+            metallicity = rng.uniform(0.001, 0.03)
+        runs.append({
+            'index': i,
+            'seed': seed,
+            'mass': mass,
+            'metallicity': metallicity,
+            'graphs': graphs,
+            'particles': particles
+        })
+    return runs
+
+def _create_app(run):
+    app = BetelgeuseSimulation(seed=run['seed'], particle_count=run['particles'])
+    app.controls.parameters["Mass (Solar Masses)"] = run['mass']
+    app.controls.parameters["Metallicity"] = run['metallicity']
+    app.show_ai_analysis = True
+    app.show_graphs = run['graphs']
+    return app
+
+def _advance(app, index):
+    app.timeline.current_time = frame_time(index)
+    app.update_frame(ticks=int(index * FRAME_MS))
+
+def render_segment(run, start, end, filename, checksum=False):
+    app = _create_app(run)
+
+    # Replay earlier frames without drawing to reach the serial state at 'start'
+    for index in range(start):
+        _advance(app, index)
+
+    digests = []
+    recorder = StreamingRecorder(filename, app.screen.get_size(), fps=VIDEO_FPS)
+    try:
+        for index in range(start, end):
+            _advance(app, index)
+            app.draw_frame()
+            recorder.capture(app.screen, block=True)
+            if checksum:
+                frame_bytes = pygame.image.tobytes(app.screen, "RGB")
+                digests.append(hashlib.blake2b(frame_bytes, digest_size=16).digest())
+    finally:
+        result = recorder.close()
+        pygame.quit()
+    # An unattended render must not pass off a broken segment as finished
+    if result['error'] is not None:
+        raise result['error']
+    return digests
+
+def concat_videos(parts, filename):
+    if len(parts) == 1:
+        shutil.move(parts[0], filename)
+        return
+
+    # Stream-copy the segments back to back without re-encoding
+    import imageio_ffmpeg
+    list_file = filename + ".parts.txt"
+    with open(list_file, "w") as f:
+        for part in parts:
+            f.write(f"file '{os.path.abspath(part)}'\n")
+    try:
+        subprocess.run([imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+                        "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", filename],
+                       check=True)
+    finally:
+        os.remove(list_file)
+
+def render_runs(runs, output_dir, segments=1, workers=None, checksum=False):
+    frames = frame_count()
+    bounds = [frames * k // segments for k in range(segments + 1)]
+    os.makedirs(output_dir, exist_ok=True)
+    parts_dir = tempfile.mkdtemp(prefix="parts_", dir=output_dir)
+
+    results = []
+    try:
+        # Spawn keeps each worker's SDL state independent of the parent
+        context = multiprocessing.get_context("spawn")
+        # Each segment ends with pygame.quit(); where supported (3.11+) it also gets a fresh worker
+        pool_options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, **pool_options) as pool:
+            jobs = []
+            for run in runs:
+                run_jobs = []
+                for k in range(segments):
+                    part = os.path.join(parts_dir, f"run_{run['index']}_part_{k}.mp4")
+                    future = pool.submit(render_segment, run, bounds[k], bounds[k + 1], part, checksum)
+                    run_jobs.append((part, future))
+                jobs.append((run, run_jobs))
+
+            for run, run_jobs in jobs:
+                digest = hashlib.blake2b(digest_size=16)
+                for _, future in run_jobs:
+                    for frame_digest in future.result():
+                        digest.update(frame_digest)
+
+                filename = os.path.join(output_dir, f"simulation_render_{run['index']}.mp4")
+                concat_videos([part for part, _ in run_jobs], filename)
+                results.append({
+                    **run,
+                    'filename': filename,
+                    'digest': digest.hexdigest() if checksum else None
+                })
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return results
+
+def _parse_params(values):
+    params = []
+    for value in values:
+        mass, metallicity = value.split(":")
+        params.append((float(mass), float(metallicity)))
+    return params
+
+def main():
+    parser = argparse.ArgumentParser(description="Render simulation videos headlessly across CPU cores")
+    parser.add_argument("--runs", type=int, default=None,
+                        help="number of runs (defaults to one per --params entry, or 1)")
+    parser.add_argument("--params", nargs="*", default=[], metavar="MASS:Z",
+                        help="explicit mass/metallicity pairs, e.g. 20:0.02 35:0.01")
+    parser.add_argument("--segments", type=int, default=1,
+                        help="split each run into this many time segments rendered in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; run i uses seed + i")
+    parser.add_argument("--output-dir", default="renders")
+    parser.add_argument("--graphs", action="store_true", help="include the graph panel")
+    parser.add_argument("--particles", type=int, default=150, help="particles per star")
+    parser.add_argument("--checksum", action="store_true",
+                        help="print a digest of the rendered frames to compare segmented and serial renders")
+    args = parser.parse_args()
+
+    params = _parse_params(args.params)
+    count = args.runs if args.runs is not None else max(1, len(params))
+    runs = make_runs(count, args.seed, params, args.graphs, args.particles)
+    segments = max(1, min(args.segments, frame_count()))
+
+    for result in render_runs(runs, args.output_dir, segments, args.workers, args.checksum):
+        line = (f"Run {result['index']} (seed {result['seed']}, mass {result['mass']:.1f}, "
+                f"Z {result['metallicity']:.3f}) -> {result['filename']}")
+        if result['digest']:
+            line += f" [frames {result['digest']}]"
+        print(line)
+
+if __name__ == "__main__":
+    main()
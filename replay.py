@@ -0,0 +1,65 @@
+import os
+# Replays render off-screen; must be set before pygame initializes its display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import pygame
+from main import BetelgeuseSimulation
+from recorder import StreamingRecorder
+from statelog import StateLogReader
+
+def replay(log_path, output, size=(1200, 800), fps=30, particles=None):
+    # Re-drive the logged inputs step by step and sample frames at the requested rate
+    log = StateLogReader(log_path)
+    header = log.header
+    app = BetelgeuseSimulation(seed=header['seed'], particle_count=particles or header['particles'],
+                               cluster_size=header['cluster_size'], size=size)
+    recorder = StreamingRecorder(output, app.screen.get_size(), fps=fps)
+
+    step_time = 0.0  # Real seconds at which the current step began
+    frame_time = 0.0
+    frames = 0
+    try:
+        for step, state in log.states():
+            app.apply_replay_state(state)
+            # Same step-derived twinkle clock as the live session (older logs started at step 0)
+            app.update_frame(ticks=int((header.get('start_step', 0) + step) * 1000 / header['step_rate']))
+
+            # Every output frame that falls inside this step, interpolated like the live clock
+            step_length = 1 / header['step_rate'] / state['time_scale']
+            while frame_time < step_time + step_length:
+                app.simulation.set_interpolation((frame_time - step_time) / step_length)
+                app.draw_frame()
+                recorder.capture(app.screen, block=True)
+                frames += 1
+                frame_time = frames / fps
+            step_time += step_length
+    finally:
+        result = recorder.close()
+        pygame.quit()
+    if result['error'] is not None:
+        raise result['error']
+    return frames
+
+def _parse_size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a state log (recorded with L or --state-log) to video")
+    parser.add_argument("log", help="state log written by the simulator")
+    parser.add_argument("--output", help="video file (defaults to the log name with .mp4)")
+    parser.add_argument("--size", type=_parse_size, default=(1200, 800), metavar="WxH",
+                        help="output resolution, e.g. 1920x1080")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--particles", type=int, default=None,
+                        help="override the particle count (changes the particle layout)")
+    args = parser.parse_args()
+
+    output = args.output or args.log.split(".jsonl")[0] + ".mp4"
+    frames = replay(args.log, output, args.size, args.fps, args.particles)
+    print(f"Rendered {frames} frames at {args.size[0]}x{args.size[1]}, {args.fps} fps -> {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from collections import deque
+import numpy as np
+
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        # Every sample is written twice so the ordered window is always one contiguous slice
+        self.storage = np.zeros(capacity * 2, dtype=dtype)
+        self.start = 0
+        self.count = 0
+        self.pushed = 0
+
+        # Monotonic queues of (sample number, value) give O(1) amortized running min/max
+        self.max_queue = deque()
+        self.min_queue = deque()
+
+    def append(self, value):
+        if self.count < self.capacity:
+            index = self.count
+            self.count += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.storage[index] = value
+        self.storage[index + self.capacity] = value
+
+        n = self.pushed
+        self.pushed += 1
+        while self.max_queue and self.max_queue[-1][1] <= value:
+            self.max_queue.pop()
+        self.max_queue.append((n, value))
+        while self.min_queue and self.min_queue[-1][1] >= value:
+            self.min_queue.pop()
+        self.min_queue.append((n, value))
+
+        # Drop extremes that slid out of the window
+        oldest = self.pushed - self.count
+        while self.max_queue[0][0] < oldest:
+            self.max_queue.popleft()
+        while self.min_queue[0][0] < oldest:
+            self.min_queue.popleft()
+
+    def values(self):
+        # Oldest-to-newest view, no copy
+        return self.storage[self.start:self.start + self.count]
+
+    def max(self):
+        return self.max_queue[0][1]
+
+    def min(self):
+        return self.min_queue[0][1]
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.max_queue.clear()
+        self.min_queue.clear()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.values()[index]
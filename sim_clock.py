@@ -0,0 +1,34 @@
+import math
+
+class SimulationClock:
+    def __init__(self, step_rate=60, time_scale=1.0, max_steps_per_frame=5):
+        self.step = 1 / step_rate  # Real seconds covered by one simulation step
+        self.time_scale = time_scale
+        self.max_steps_per_frame = max_steps_per_frame
+        self.accumulator = 0.0
+        self.skipped_steps = 0
+
+    def advance(self, real_dt):
+        # Returns how many fixed steps to run for this rendered frame. When rendering falls
+        # behind several steps run back to back (frames are skipped, simulated time is not).
+        self.accumulator += real_dt * self.time_scale
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        # The cap is in frames' worth of steps, so a faster time scale still gets its full rate
+        max_steps = math.ceil(self.max_steps_per_frame * max(1.0, self.time_scale))
+        if steps > max_steps:
+            # Too far behind to catch up; drop the backlog rather than spiral
+            self.skipped_steps += steps - max_steps
+            steps = max_steps
+        return steps
+
+    @property
+    def alpha(self):
+        # Fraction of a step already elapsed, for interpolating rendered state
+        return min(1.0, self.accumulator / self.step)
+
+    def scale_time(self, factor, minimum=0.125, maximum=8.0):
+        self.time_scale = max(minimum, min(maximum, self.time_scale * factor))
+
+    def reset(self):
+        self.accumulator = 0.0
@@ -0,0 +1,107 @@
+import numpy as np
+import pygame
+
+class SpriteAtlas:
+    def __init__(self, min_radius=2, max_radius=6, alpha_buckets=16, stamp_threshold=20_000):
+        self.min_radius = min_radius
+        self.max_radius = max_radius
+        self.radii = list(range(min_radius, max_radius + 1))
+        self.alpha_buckets = alpha_buckets
+        self.palette = None
+        self.sprites = []
+        self.sprites_by_palette = {}
+        # Past this many particles one blit each is too slow; they are stamped as dots instead
+        self.stamp_threshold = stamp_threshold
+        self.dot_radius = 1
+        self.dot_colors = None
+        self.dot_footprint = None
+
+    def use_palette(self, palette):
+        # Lazily (re)build when the stage palette changes; previous palettes stay cached
+        palette = tuple(tuple(color) for color in palette)
+        if palette == self.palette:
+            return
+        if palette not in self.sprites_by_palette:
+            self.sprites_by_palette[palette] = self._build(palette)
+        self.palette = palette
+        self.sprites = self.sprites_by_palette[palette]
+        self.dot_colors = np.array(palette, dtype=np.float32)
+
+    def _build(self, palette):
+        # Flat layout: [color][radius][alpha bucket]
+        sprites = []
+        for color in palette:
+            for radius in self.radii:
+                for bucket in range(self.alpha_buckets):
+                    alpha = round(255 * (bucket + 1) / self.alpha_buckets)
+                    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                    pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+                    sprites.append(sprite)
+        return sprites
+
+    def draw(self, screen, xs, ys, color_index, size, opacity):
+        radius = np.clip(size.astype(np.int32), self.min_radius, self.max_radius)
+        bucket = np.minimum((opacity * self.alpha_buckets).astype(np.int32), self.alpha_buckets - 1)
+        color_index = np.minimum(color_index, len(self.palette) - 1)
+        if len(xs) > self.stamp_threshold:
+            self._stamp(screen, xs, ys, color_index * self.alpha_buckets + bucket)
+            return
+        index = (color_index * len(self.radii) + (radius - self.min_radius)) * self.alpha_buckets + bucket
+
+        # Cull sprites that fall entirely off-screen
+        left = (xs - radius).astype(np.int32)
+        top = (ys - radius).astype(np.int32)
+        visible = ((left < screen.get_width()) & (left + 2 * radius > 0) &
+                   (top < screen.get_height()) & (top + 2 * radius > 0))
+
+        sprites = self.sprites
+        screen.blits([(sprites[i], (x, y)) for i, x, y in
+                      zip(index[visible].tolist(), left[visible].tolist(), top[visible].tolist())],
+                     doreturn=False)
+
+    def _footprint(self, radius):
+        # Pixel offsets pygame.draw.circle covers for a disc of this radius
+        mask = pygame.Surface((radius * 2, radius * 2))
+        pygame.draw.circle(mask, (255, 255, 255), (radius, radius), radius)
+        return np.nonzero(pygame.surfarray.array2d(mask))
+
+    def _stamp(self, screen, xs, ys, key):
+        # Small dots written straight into the pixels; where dots overlap the last one wins.
+        # key is color_index * alpha_buckets + bucket, so each covered pixel gathers one value.
+        dot = self.dot_radius
+        clip = screen.get_clip()  # Direct pixel writes must honor the clip like blits do
+        left = xs.astype(np.int32) - dot
+        top = ys.astype(np.int32) - dot
+        inside = (((left - clip.left).view(np.uint32) <= clip.width - 2 * dot) &
+                  ((top - clip.top).view(np.uint32) <= clip.height - 2 * dot))
+        ids = np.flatnonzero(inside).astype(np.int32)
+        if len(ids) == 0:
+            return
+        left, top = left[ids], top[ids]
+        x0, y0 = int(left.min()), int(top.min())
+        width = int(left.max()) - x0 + 2 * dot
+        height = int(top.max()) - y0 + 2 * dot
+
+        # Scatter particle ids into the covered box, then blend each covered pixel once
+        if self.dot_footprint is None:
+            self.dot_footprint = self._footprint(dot)
+        dx, dy = self.dot_footprint
+        owner = np.full(width * height, -1, dtype=np.int32)
+        cells = ((left - x0) * height + (top - y0))[:, None] + (dx * height + dy).astype(np.int32)
+        owner[cells.ravel()] = np.repeat(ids, len(dx))
+        touched = np.flatnonzero(owner >= 0)
+        key = key[owner[touched]]
+        alpha = (key % self.alpha_buckets + 1).astype(np.float32) / self.alpha_buckets
+        colors = self.dot_colors[key // self.alpha_buckets]
+
+        pixels = pygame.surfarray.pixels2d(screen)
+        region = pixels[x0:x0 + width, y0:y0 + height]
+        px, py = np.divmod(touched, height)
+        packed = region[px, py]
+        result = np.zeros(len(touched), dtype=np.uint32)
+        for channel, shift in enumerate(screen.get_shifts()[:3]):
+            value = ((packed >> shift) & 255).astype(np.float32)
+            value += (colors[:, channel] - value) * alpha
+            result |= value.astype(np.uint32) << shift
+        region[px, py] = result
+        del pixels, region  # Unlock the surface
@@ -1,7 +1,11 @@
-import pygame
 import math
-import random
+import pygame
 from enum import Enum
+from particles import ParticleSystem
+from sprite_atlas import SpriteAtlas
+from surface_cache import SurfaceCache
+from evolution_track import get_track
+from ejecta import SupernovaEjecta
 
 class StarStage(Enum):
     NEBULA = "Stellar Nebula"
@@ -11,17 +15,44 @@ class StarStage(Enum):
     SUPERNOVA = "Supernova"
     FINAL = "Final Form"
 
+# Evolution track stage codes index this list
+STAGES = list(StarStage)
+
 class StarSimulation:
-    def __init__(self):
+    def __init__(self, particle_count=150, seed=None, ejecta_count=50_000):
+        self.seed = seed
         self.current_stage = StarStage.NEBULA
+        self.previous_stage = StarStage.NEBULA
         self.time = 0
         self.base_size = 150
         self.size = self.base_size
-        self.particles = []
+        self.previous_size = self.size
+        self.interpolation = 1.0  # Fraction of the way from the previous step to this one
+        self.particles = None
         self.mass = 20
         self.metallicity = 0.02
         self.transition_progress = 0
-        self.generate_particles(150)
+        self.track = get_track(self.mass, self.metallicity)
+        self.state = self.track.sample(0)
+        self.generate_particles(particle_count)
+        self.ejecta = SupernovaEjecta(ejecta_count, seed=seed)
+        self.particle_atlas = SpriteAtlas()
+        self.layer_cache = SurfaceCache()  # Pre-composited glow and core per (stage, size)
+        self.size_quantum = 2  # Matches the core gradient ring spacing
+        self.easing_step = 1.25  # While the size eases, layers are built one rung of this ratio apart and scaled
+        self.target_size = self.size
+        
+        # Level-of-detail settings, lowered by the quality controller under load
+        self.particle_fraction = 1.0
+        self.glow_layers = 15
+        
+        # Per-step particle and ejecta motion; a paused kiosk turns it off so idle frames are identical
+        self.animate = True
+        self.animation_steps = 0
+        
+        # Last reported look and screen region, for dirty-rect rendering
+        self.presented_state = None
+        self.presented_rect = None
         
         # Enhanced colors with more gradients
         self.colors = {
@@ -44,95 +75,177 @@ class StarSimulation:
         }
         
     def generate_particles(self, count):
-        self.particles = []
-        for _ in range(count):
-            self.particles.append(self._create_particle())
-    
-    def _create_particle(self):
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(0.5, 2)
-        distance = random.uniform(self.size * 0.8, self.size * 2.5)
-        return {
-            'angle': angle,
-            'speed': speed,
-            'distance': distance,
-            'size': random.uniform(2, 6),
-            'opacity': random.uniform(0.3, 1.0)
-        }
+        self.particles = ParticleSystem(count, self.size, seed=self.seed)
+            
+    def set_detail(self, settings):
+        self.particle_fraction = settings['particles']
+        self.glow_layers = settings['glow_layers']
+        self.ejecta.draw_fraction = settings['supernova_effects']
+            
+    def set_interpolation(self, alpha):
+        self.interpolation = alpha
+        
+    def render_size(self):
+        return self.previous_size + (self.size - self.previous_size) * self.interpolation
             
     def update(self):
         # Update time and stage
         prev_stage = self.current_stage
+        self.previous_size = self.size
         
-        if self.time < 0.5:
-            self.current_stage = StarStage.NEBULA
-        elif self.time < 2:
-            self.current_stage = StarStage.PROTOSTAR
-        elif self.time < 8:
-            self.current_stage = StarStage.MAIN_SEQUENCE
-        elif self.time < 11.9:
-            self.current_stage = StarStage.RED_SUPERGIANT
-        elif self.time < 11.99:
-            self.current_stage = StarStage.SUPERNOVA
-        else:
-            self.current_stage = StarStage.FINAL
+        # Stage and physical state are indexed from the precomputed track
+        self.track = get_track(self.mass, self.metallicity)
+        self.state = self.track.sample(self.track.index(self.time))
+        self.current_stage = STAGES[self.state['stage']]
             
         # Handle stage transition
         if prev_stage != self.current_stage:
+            self.previous_stage = prev_stage
             self.transition_progress = 0
+            # The explosion throws off its shell once, on entering the supernova stage
+            if self.current_stage == StarStage.SUPERNOVA:
+                self.ejecta.spawn(self.size)
+        if self.current_stage not in (StarStage.SUPERNOVA, StarStage.FINAL):
+            self.ejecta.clear()  # Scrubbed back before the explosion
+        if self.animate:
+            self.ejecta.update()
         self.transition_progress = min(1, self.transition_progress + 0.02)
         
         # Update size based on stage and mass
-        target_size = self.base_size * self.size_multipliers[self.current_stage] * (self.mass / 20)
-        self.size += (target_size - self.size) * 0.1
+        self.target_size = self.base_size * self.size_multipliers[self.current_stage] * (self.mass / 20)
+        self.size += (self.target_size - self.size) * 0.1
         
-        # Update particles
-        for particle in self.particles:
-            particle['angle'] += particle['speed'] * 0.02 * (self.mass / 20)
-            particle['opacity'] = random.uniform(0.3, 1.0)
-            
-            # Regenerate particles that get too far
-            if random.random() < 0.01:
-                particle.update(self._create_particle())
+        # Update particles in one batch
+        if self.animate:
+            self.particles.update(0.02 * (self.mass / 20), self.size, len(self.colors[self.current_stage]))
+            self.animation_steps += 1
             
     def draw(self, screen):
         center_x = screen.get_width() // 2
         center_y = screen.get_height() // 2
         
-        # Draw background glow
-        glow_surface = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
         colors = self.colors[self.current_stage]
-        for i in range(15):
-            alpha = int(100 - i * 6)
-            color = (*colors[0][:3], alpha)
-            radius = self.size * (1.5 + i * 0.2)
-            pygame.draw.circle(glow_surface, color, (center_x, center_y), int(radius))
-        screen.blit(glow_surface, (0, 0))
-        
-        # Draw particles with opacity
-        for particle in self.particles:
-            x = center_x + math.cos(particle['angle']) * particle['distance']
-            y = center_y + math.sin(particle['angle']) * particle['distance']
-            color = random.choice(self.colors[self.current_stage])
-            particle_surface = pygame.Surface((int(particle['size'] * 2), int(particle['size'] * 2)), pygame.SRCALPHA)
-            pygame.draw.circle(particle_surface, (*color, int(255 * particle['opacity'])),
-                             (int(particle['size']), int(particle['size'])), int(particle['size']))
-            screen.blit(particle_surface, (int(x - particle['size']), int(y - particle['size'])))
+        
+        # Draw background glow
+        self._draw_stage_layer(screen, 'glow', self._build_glow, self._glow_extent())
+        
+        # Draw particles with opacity from pre-rendered sprites in one batch
+        xs, ys = self.particles.positions(center_x, center_y, self.interpolation)
+        # Particles are placed at random, so any prefix is a fair sample
+        shown = int(self.particles.count * self.particle_fraction)
+        self.particle_atlas.use_palette(colors)
+        self.particle_atlas.draw(screen, xs[:shown], ys[:shown], self.particles.color_index[:shown],
+                                 self.particles.size[:shown], self.particles.opacity[:shown])
         
         # Draw star core with enhanced gradient
-        for i in range(int(self.size), 0, -2):
-            progress = i / self.size
-            color_idx = min(int(progress * len(colors)), len(colors) - 1)
-            color = colors[color_idx]
-            pygame.draw.circle(screen, color, (center_x, center_y), i)
+        self._draw_stage_layer(screen, 'core', self._build_core, 1)
             
-        # Special effects for supernova
-        if self.current_stage == StarStage.SUPERNOVA:
-            for _ in range(10):
-                angle = random.uniform(0, 2 * math.pi)
-                distance = random.uniform(0, self.size * 2)
-                x = center_x + math.cos(angle) * distance
-                y = center_y + math.sin(angle) * distance
-                size = random.uniform(2, 8)
-                color = random.choice(colors)
-                pygame.draw.circle(screen, color, (int(x), int(y)), int(size))
\ No newline at end of file
+        # Supernova ejecta, splatted additively over everything else
+        self.ejecta.draw(screen, center_x, center_y, self.interpolation)
+
+    def dirty_rects(self, screen_size):
+        # The star's whole box whenever anything it draws changed, plus the box it covered last time
+        transitioning = self.previous_stage != self.current_stage and self.transition_progress < 1
+        size = self._quantized_size()
+        state = (self.current_stage, self.previous_stage if transitioning else None,
+                 int(255 * self.transition_progress) if transitioning else None, size, self._easing(),
+                 self.glow_layers, self.particle_fraction, self.animation_steps, self.interpolation,
+                 self.ejecta.active, self.ejecta.age, self.ejecta.draw_fraction)
+        if state == self.presented_state:
+            return []
+        self.presented_state = state
+        
+        width, height = screen_size
+        reach = size * self._glow_extent()
+        if self.particles.count:
+            reach = max(reach, float(self.particles.distance.max() + self.particles.size.max()))
+        rect = pygame.Rect(0, 0, int(reach) * 2 + 4, int(reach) * 2 + 4)
+        rect.center = (width // 2, height // 2)
+        ejecta = self.ejecta.bounds(*rect.center)
+        if ejecta is not None:
+            rect.union_ip(ejecta)
+        
+        rects = [rect] if self.presented_rect is None else [rect, self.presented_rect]
+        self.presented_rect = rect
+        return rects
+    
+    def _quantize(self, size):
+        return max(self.size_quantum, round(size / self.size_quantum) * self.size_quantum)
+    
+    def _quantized_size(self):
+        return self._quantize(self.render_size())
+    
+    def _easing(self):
+        # Settled once the drawn size has reached the quantized target, so that is the only exact layer built
+        return self._quantized_size() != self._quantize(self.target_size)
+    
+    def _rung_size(self, size):
+        # Largest rung of the easing ladder at or below size, so a rung layer is only ever scaled up
+        rung = self.base_size * self.easing_step ** math.floor(math.log(size / self.base_size, self.easing_step))
+        return self._quantize(rung)
+    
+    def _glow_extent(self):
+        # Outermost glow ring, in star radii
+        return 1.5 + (self.glow_layers - 1) * 0.2
+    
+    def _layer_box(self, size, extent, width, height):
+        reach = int(size * extent) * 2 + 2
+        return (min(reach, width), min(reach, height))
+    
+    def _draw_stage_layer(self, screen, kind, build, extent):
+        # Blit a cached layer sized to the star's bounding box (clipped to the screen)
+        size = self._quantized_size()
+        width, height = screen.get_size()
+        box = self._layer_box(size, extent, width, height)
+        pos = (width // 2 - box[0] // 2, height // 2 - box[1] // 2)
+        # Easing changes the size every step: scale the nearest rung below instead of rebuilding each time
+        rung = self._rung_size(size) if self._easing() else size
+        rung_box = self._layer_box(rung, extent, width, height)
+        
+        def layer(stage):
+            key = (kind, stage, rung, rung_box, self.glow_layers)
+            surface = self.layer_cache.get(key, lambda: build(stage, rung, rung_box))
+            if rung == size:
+                return surface
+            # The part of the rung layer that lands on screen once scaled, taken from its center
+            scale = size / rung
+            source = pygame.Rect(0, 0, min(rung_box[0], math.ceil(box[0] / scale)),
+                                 min(rung_box[1], math.ceil(box[1] / scale)))
+            source.center = (rung_box[0] // 2, rung_box[1] // 2)
+            return pygame.transform.scale(surface.subsurface(source), box)
+        
+        # Cross-fade from the previous stage at the same size while the transition runs
+        if self.previous_stage != self.current_stage and self.transition_progress < 1:
+            previous = layer(self.previous_stage)
+            previous.set_alpha(255)
+            screen.blit(previous, pos)
+            current = layer(self.current_stage)
+            current.set_alpha(int(255 * self.transition_progress))
+            screen.blit(current, pos)
+        else:
+            current = layer(self.current_stage)
+            current.set_alpha(255)
+            screen.blit(current, pos)
+    
+    def _build_glow(self, stage, size, box):
+        surface = pygame.Surface(box, pygame.SRCALPHA)
+        center = (box[0] // 2, box[1] // 2)
+        colors = self.colors[stage]
+        # Rings keep their spacing and the alpha still fades out, so fewer layers give a tighter glow
+        spacing = 1 / max(self.glow_layers - 1, 1)
+        for i in range(self.glow_layers):
+            alpha = int(100 - i * 84 * spacing)
+            color = (*colors[0][:3], alpha)
+            radius = size * (1.5 + i * 0.2)
+            pygame.draw.circle(surface, color, center, int(radius))
+        return surface
+    
+    def _build_core(self, stage, size, box):
+        surface = pygame.Surface(box, pygame.SRCALPHA)
+        center = (box[0] // 2, box[1] // 2)
+        colors = self.colors[stage]
+        for i in range(int(size), 0, -2):
+            progress = i / size
+            color_idx = min(int(progress * len(colors)), len(colors) - 1)
+            pygame.draw.circle(surface, colors[color_idx], center, i)
+        return surface
\ No newline at end of file
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import math
+import numpy as np
+
+STAR_FIELDS = ('x', 'y', 'size', 'twinkle_speed')
+
+class Starfield:
+    def __init__(self, density, seed=0, tile_size=256, max_stars=2_000_000):
+        self.density = density  # Stars per square world unit
+        self.seed = seed
+        self.tile_size = tile_size
+        self.max_stars = max_stars
+        self.tiles = OrderedDict()
+        self.cached_stars = 0
+        self.visible_key = None
+        self.visible = None
+
+    def _generate_tile(self, tx, ty):
+        # Every tile is reproducible from (seed, tx, ty), so evicted tiles regenerate identically
+        rng = np.random.default_rng([self.seed, tx & 0xFFFFFFFF, ty & 0xFFFFFFFF])
+        count = rng.poisson(self.density * self.tile_size ** 2)
+        return {
+            'x': ((tx + rng.random(count)) * self.tile_size).astype(np.float32),
+            'y': ((ty + rng.random(count)) * self.tile_size).astype(np.float32),
+            'size': rng.uniform(1, 3, count).astype(np.float32),
+            'twinkle_speed': rng.uniform(0.01, 0.05, count).astype(np.float32)
+        }
+
+    def tile(self, tx, ty):
+        key = (tx, ty)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        tile = self._generate_tile(tx, ty)
+        self.tiles[key] = tile
+        self.cached_stars += len(tile['x'])
+
+        # Evict least recently used tiles once over the star budget
+        while self.cached_stars > self.max_stars and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.cached_stars -= len(evicted['x'])
+        return tile
+
+    def visible_stars(self, left, top, right, bottom):
+        # Only tiles overlapping the world-space viewport are generated or visited
+        t = self.tile_size
+        tile_range = (math.floor(left / t), math.floor(top / t), math.floor(right / t), math.floor(bottom / t))
+        if tile_range == self.visible_key:
+            return self.visible
+
+        tx0, ty0, tx1, ty1 = tile_range
+        tiles = [self.tile(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+        self.visible = {field: np.concatenate([tile[field] for tile in tiles]) for field in STAR_FIELDS}
+        self.visible_key = tile_range
+        return self.visible
@@ -0,0 +1,41 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupProfile:
+    # Wall time of each import and init phase, in the order they ran; stdlib only so it can time the rest
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.lock = threading.Lock()  # Deferred loads may finish on a background thread
+
+    @contextmanager
+    def phase(self, name):
+        # Yields this phase's timing ('ms' is set when it ends); the last entry in phases may be another thread's
+        timing = {'name': name, 'ms': None}
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing['ms'] = (time.perf_counter() - start) * 1000
+            self.record(name, timing['ms'])
+
+    def record(self, name, ms):
+        with self.lock:
+            self.phases.append((name, ms))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self, title="Startup to first frame"):
+        # Phases, then whatever ran between them (glue code, interpreter start not included).
+        # A phase on a background thread overlaps the others, so the remainder is floored at zero.
+        total = self.elapsed_ms()
+        with self.lock:
+            phases = list(self.phases)
+        measured = min(total, sum(ms for _, ms in phases))
+        lines = [f"{title}: {total:.1f} ms"]
+        for name, ms in phases:
+            lines.append(f"  {name:<30}{ms:9.1f} ms {ms / total * 100:5.1f}%")
+        lines.append(f"  {'(other)':<30}{total - measured:9.1f} ms {(total - measured) / total * 100:5.1f}%")
+        return "\n".join(lines)
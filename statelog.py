@@ -0,0 +1,59 @@
+import gzip
+import json
+
+STATE_LOG_VERSION = 1
+
+def _open(path, mode):
+    # '.gz' logs are compressed; plain JSON lines otherwise
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class StateLogWriter:
+    # One JSON line per simulation step whose inputs changed; unchanged steps cost nothing
+    def __init__(self, path, header):
+        self.path = path
+        self.file = _open(path, 'w')
+        self.file.write(json.dumps({'version': STATE_LOG_VERSION, **header}, separators=(',', ':')) + '\n')
+        self.previous = {}
+        self.steps = 0
+
+    def record(self, state):
+        changed = {key: value for key, value in state.items()
+                   if key not in self.previous or self.previous[key] != value}
+        if changed:
+            self.file.write(json.dumps({'step': self.steps, **changed}, separators=(',', ':')) + '\n')
+            self.previous.update(changed)
+        self.steps += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        # Trailing record so a replay knows how many steps ran after the last change
+        self.file.write(json.dumps({'step': self.steps, 'end': True}, separators=(',', ':')) + '\n')
+        self.file.close()
+        self.file = None
+
+class StateLogReader:
+    def __init__(self, path):
+        with _open(path, 'r') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        self.header = lines[0]
+        if self.header.get('version') != STATE_LOG_VERSION:
+            raise ValueError(f"Unsupported state log version in {path}: {self.header.get('version')}")
+
+        # Changes keyed by step; a log cut short (no end record) replays up to its last change
+        self.changes = {}
+        self.steps = 0
+        for record in lines[1:]:
+            step = record.pop('step')
+            self.steps = max(self.steps, step + (0 if record.pop('end', False) else 1))
+            if record:
+                self.changes[step] = record
+
+    def states(self):
+        # Full input state for every step, in order
+        state = {}
+        for step in range(self.steps):
+            state.update(self.changes.get(step, {}))
+            yield step, state
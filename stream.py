@@ -0,0 +1,173 @@
+import io
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pygame
+
+INDEX_PAGE = (b'<!doctype html><title>Betelgeuse Life Cycle Simulation</title>'
+              b'<body style="margin:0;background:#05050f">'
+              b'<img src="/stream.mjpg" style="width:100vw;height:100vh;object-fit:contain"></body>')
+
+class FrameStreamServer:
+    # Composited frames over HTTP as MJPEG: each frame is JPEG-encoded once, on a worker thread,
+    # and the same bytes go to every viewer. A viewer that falls behind skips to the newest frame.
+    def __init__(self, size, host='127.0.0.1', port=8080, fps=30):
+        self.width, self.height = size
+        self.frame_interval = 1 / fps
+        self.last_capture = 0.0
+        self.captured_frames = 0
+        self.dropped_frames = 0  # Captured, then replaced by a newer frame before the encoder got to it
+        self.encoded_frames = 0
+        self.skipped_frames = 0  # Encoded frames some viewer never received because it was behind
+        self.clients = 0
+        self.running = True
+
+        # Three reused buffers of packed pixels: one being filled, at most one waiting, at most one being encoded
+        self.free_buffers = [np.empty((self.height, self.width), dtype=np.uint32) for _ in range(3)]
+        self.pending = None
+        self.encode_surface = None  # Same pixel format as the screen, only touched by the encoder
+        self.capture_ready = threading.Condition()
+
+        # Newest encoded frame, shared by every viewer
+        self.jpeg = None
+        self.sequence = 0
+        self.frame_ready = threading.Condition()
+
+        self.encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.encoder_thread.start()
+
+        self.server = ThreadingHTTPServer((host, port), _ViewerHandler)
+        self.server.daemon_threads = True
+        self.server.stream = self
+        self.address = self.server.server_address[:2]
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    @property
+    def url(self):
+        return f"http://{self.address[0]}:{self.address[1]}/"
+
+    def capture(self, surface):
+        # Never waits: nothing is copied without viewers, and frames beyond the stream rate are skipped
+        if not self.clients:
+            return False
+        now = time.perf_counter()
+        if now - self.last_capture < self.frame_interval:
+            return False
+        self.last_capture = now
+
+        if self.encode_surface is None:
+            self.encode_surface = surface.copy()
+        with self.capture_ready:
+            buffer = self.free_buffers.pop()
+        # Packed pixels in memory order: a straight copy, no per-channel unpacking on the render thread
+        pixels = pygame.surfarray.pixels2d(surface)
+        buffer[...] = pixels.T
+        del pixels  # Unlock the surface
+
+        with self.capture_ready:
+            if self.pending is not None:
+                # Encoder is still busy with an older frame; the waiting one is stale now
+                self.free_buffers.append(self.pending)
+                self.dropped_frames += 1
+            self.pending = buffer
+            self.capture_ready.notify()
+        self.captured_frames += 1
+        return True
+
+    def _encode_loop(self):
+        while True:
+            with self.capture_ready:
+                self.capture_ready.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    break
+                buffer, self.pending = self.pending, None
+
+            pixels = pygame.surfarray.pixels2d(self.encode_surface)
+            pixels.T[...] = buffer
+            del pixels  # Unlock the surface
+            with self.capture_ready:
+                self.free_buffers.append(buffer)
+            output = io.BytesIO()
+            pygame.image.save(self.encode_surface, output, "frame.jpg")
+
+            with self.frame_ready:
+                self.jpeg = output.getvalue()
+                self.sequence += 1
+                self.encoded_frames += 1
+                self.frame_ready.notify_all()
+
+    def next_frame(self, sent):
+        # Newest frame after sequence 'sent', or None once the server stops
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: self.sequence != sent or not self.running)
+            if not self.running:
+                return None, sent
+            if sent:
+                self.skipped_frames += self.sequence - sent - 1
+            return self.jpeg, self.sequence
+
+    def serve_viewer(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        handler.send_header('Cache-Control', 'no-cache, no-store')
+        handler.end_headers()
+
+        with self.frame_ready:
+            self.clients += 1
+            sent = self.sequence  # Start from a fresh frame, not one left over from earlier viewers
+        try:
+            while True:
+                jpeg, sent = self.next_frame(sent)
+                if jpeg is None:
+                    break
+                # Blocks only this viewer's thread; meanwhile newer frames replace the one it missed
+                handler.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+                                    % len(jpeg) + jpeg + b'\r\n')
+        except OSError:
+            pass  # Viewer disconnected or stopped reading
+        finally:
+            with self.frame_ready:
+                self.clients -= 1
+
+    def close(self):
+        self.running = False
+        with self.capture_ready:
+            self.capture_ready.notify_all()
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+        self.encoder_thread.join()
+        self.server.shutdown()
+        self.server.server_close()
+
+class _ViewerHandler(BaseHTTPRequestHandler):
+    timeout = 10  # A viewer that stops reading for this long is dropped
+    send_buffer = 128 * 1024  # Bytes the kernel may queue per viewer before the frame is known
+
+    def setup(self):
+        super().setup()
+        # Keep about one frame queued: the kernel's default buffers hold seconds of stale frames
+        # that a slow viewer would work through before ever reaching a fresh one.
+        # Linux doubles the requested size, so ask for half a frame.
+        jpeg = self.server.stream.jpeg
+        frame_bytes = len(jpeg) if jpeg is not None else self.send_buffer
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, frame_bytes // 2)
+
+    def do_GET(self):
+        stream = self.server.stream
+        path = self.path.split('?')[0]
+        if path == '/stream.mjpg':
+            stream.serve_viewer(self)
+        elif path == '/':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(INDEX_PAGE)))
+            self.end_headers()
+            self.wfile.write(INDEX_PAGE)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass  # One line per request would flood the simulator's console
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+class SurfaceCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = build()
+        self.entries[key] = surface
+        self.total_bytes += self._surface_bytes(surface)
+
+        # Evict least recently used surfaces once over budget (always keep the newest)
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= self._surface_bytes(evicted)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_pitch() * surface.get_height()
@@ -0,0 +1,218 @@
+import os
+# Stage names come from star_simulation, which imports pygame; keep workers quiet
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import io
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from ai_predictor import StarPredictor, OUTCOME_NAMES
+from evolution_track import EvolutionTrack, TIME_STEP
+from star_simulation import STAGES
+
+COLUMNS = ('mass', 'metallicity', 'time', 'stage', 'temperature', 'luminosity', 'radius',
+           'current_mass', 'mass_loss_rate', 'predicted_outcome', 'confidence')
+STAGE_NAMES = np.array([stage.value for stage in STAGES])
+OUTCOME_LABELS = np.array(OUTCOME_NAMES)
+
+# One predictor per worker process, loaded from the exported decision table
+_predictor = None
+
+def make_grid(mass_range, metallicity_range):
+    masses = np.linspace(mass_range[0], mass_range[1], int(mass_range[2]))
+    metallicities = np.linspace(metallicity_range[0], metallicity_range[1], int(metallicity_range[2]))
+    mm, zz = np.meshgrid(masses, metallicities, indexing='ij')
+    return np.column_stack([mm.ravel(), zz.ravel()])
+
+def evaluate_chunk(pairs, time_stride):
+    # Every (mass, Z) pair in the chunk over the shared time grid; returns columns as arrays
+    global _predictor
+    if _predictor is None:
+        _predictor = StarPredictor()
+
+    tracks = [EvolutionTrack(mass, metallicity) for mass, metallicity in pairs]
+    steps = len(tracks[0].times[::time_stride])
+    prediction = _predictor.predict_batch(pairs[:, 0], pairs[:, 1])
+
+    def stacked(name):
+        return np.concatenate([getattr(track, name)[::time_stride] for track in tracks])
+
+    return {
+        'mass': np.repeat(pairs[:, 0], steps),
+        'metallicity': np.repeat(pairs[:, 1], steps),
+        'time': stacked('times'),
+        'stage': stacked('stage'),
+        'temperature': stacked('temperature'),
+        'luminosity': stacked('luminosity'),
+        'radius': stacked('radius'),
+        'current_mass': stacked('current_mass'),
+        'mass_loss_rate': stacked('mass_loss_rate'),
+        'predicted_outcome': np.repeat(prediction['outcome'], steps),
+        'confidence': np.repeat(prediction['confidence'], steps)
+    }
+
+def format_csv(columns):
+    # Formatted in the worker so text conversion runs on every core
+    rows = len(columns['time'])
+    buffer = io.StringIO()
+    table = np.empty((rows, len(COLUMNS)), dtype=object)
+    for i, name in enumerate(COLUMNS):
+        if name == 'stage':
+            table[:, i] = STAGE_NAMES[columns[name]]
+        elif name == 'predicted_outcome':
+            table[:, i] = OUTCOME_LABELS[columns[name]]
+        else:
+            table[:, i] = columns[name]
+    np.savetxt(buffer, table, fmt=('%.4f', '%.5f', '%.2f', '%s', '%.1f', '%.6g', '%.6g',
+                                   '%.4f', '%.6g', '%s', '%.1f'), delimiter=',')
+    return buffer.getvalue().encode()
+
+def csv_job(pairs, time_stride):
+    columns = evaluate_chunk(pairs, time_stride)
+    return format_csv(columns), len(columns['time'])
+
+def parquet_job(pairs, time_stride, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    columns = evaluate_chunk(pairs, time_stride)
+    arrays = {name: columns[name] for name in COLUMNS}
+    arrays['stage'] = pa.DictionaryArray.from_arrays(columns['stage'].astype(np.int8), STAGE_NAMES.tolist())
+    arrays['predicted_outcome'] = pa.DictionaryArray.from_arrays(
+        columns['predicted_outcome'].astype(np.int8), OUTCOME_NAMES)
+
+    # Written under a temporary name so an interrupted part is never mistaken for a finished one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(pa.table(arrays), tmp_path)
+    os.replace(tmp_path, path)
+    return None, len(columns['time'])
+
+class SweepProgress:
+    # Finished chunks (and for CSV the committed file size) saved beside the output
+    def __init__(self, path, spec):
+        self.path = path
+        self.spec = spec
+        self.done = set()
+        self.offset = 0
+        self.rows = 0
+
+    def load(self):
+        with open(self.path) as f:
+            state = json.load(f)
+        if state['spec'] != self.spec:
+            raise ValueError(f"{self.path} belongs to a different sweep; remove it or drop --resume")
+        self.done = set(state['done'])
+        self.offset = state['offset']
+        self.rows = state['rows']
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'spec': self.spec, 'done': sorted(self.done), 'offset': self.offset, 'rows': self.rows}, f)
+        os.replace(tmp_path, self.path)
+
+def run_sweep(pairs, output, fmt='csv', time_stride=1, chunk_size=64, workers=None, resume=False, spec=None):
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    progress = SweepProgress(output + ".progress.json", spec or {})
+    if resume and os.path.exists(progress.path):
+        progress.load()
+
+    # Train or load the model once up front so workers only ever read the artifact
+    StarPredictor()
+
+    data_file = None
+    if fmt == 'csv':
+        data_file = open(output, "r+b" if progress.done else "wb")
+        # Anything past the last committed chunk is a partial write from an interrupted run
+        data_file.truncate(progress.offset)
+        data_file.seek(progress.offset)
+        if not progress.done:
+            data_file.write((",".join(COLUMNS) + "\n").encode())
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    pending = [i for i in range(len(chunks)) if i not in progress.done]
+    started = time.perf_counter()
+    new_rows = 0
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # Keep a bounded number of chunks in flight so results stream out as they finish
+            in_flight = {}
+            limit = 2 * (workers or os.cpu_count() or 1)
+            while pending or in_flight:
+                while pending and len(in_flight) < limit:
+                    index = pending.pop(0)
+                    if fmt == 'csv':
+                        future = pool.submit(csv_job, chunks[index], time_stride)
+                    else:
+                        part = os.path.join(output, f"part-{index:06d}.parquet")
+                        future = pool.submit(parquet_job, chunks[index], time_stride, part)
+                    in_flight[future] = index
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = in_flight.pop(future)
+                    payload, rows = future.result()
+                    if data_file is not None:
+                        data_file.write(payload)
+                        data_file.flush()
+                        os.fsync(data_file.fileno())
+                        progress.offset = data_file.tell()
+                    progress.done.add(index)
+                    progress.rows += rows
+                    new_rows += rows
+                    progress.save()
+    finally:
+        if data_file is not None:
+            if not progress.done:
+                progress.offset = data_file.tell()  # Header only
+                progress.save()
+            data_file.close()
+
+    elapsed = time.perf_counter() - started
+    return {'rows': progress.rows, 'new_rows': new_rows, 'seconds': elapsed, 'chunks': len(chunks)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate evolution tracks and predictions over a parameter grid")
+    parser.add_argument("--mass", nargs=3, type=float, default=(8, 50, 421), metavar=("MIN", "MAX", "STEPS"))
+    parser.add_argument("--metallicity", nargs=3, type=float, default=(0.001, 0.03, 30),
+                        metavar=("MIN", "MAX", "STEPS"))
+    parser.add_argument("--time-step", type=float, default=TIME_STEP,
+                        help=f"sampling interval in billion years (a multiple of {TIME_STEP})")
+    parser.add_argument("--output", default="sweep.csv",
+                        help="CSV file, or a directory of Parquet parts when the name ends in .parquet")
+    parser.add_argument("--format", choices=("auto", "csv", "parquet"), default="auto")
+    parser.add_argument("--chunk-size", type=int, default=64, help="(mass, Z) pairs per work unit")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to CPU count)")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted sweep into the same output")
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "parquet" if args.output.endswith(".parquet") else "csv"
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    time_stride = max(1, round(args.time_step / TIME_STEP))
+    spec = {'mass': list(args.mass), 'metallicity': list(args.metallicity), 'time_stride': time_stride,
+            'chunk_size': args.chunk_size, 'format': fmt}
+    pairs = make_grid(args.mass, args.metallicity)
+    try:
+        summary = run_sweep(pairs, args.output, fmt, time_stride, args.chunk_size, args.workers, args.resume, spec)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    rate = summary['new_rows'] / max(summary['seconds'], 1e-9) * 60
+    print(f"{summary['rows']:,} rows in {args.output} ({summary['new_rows']:,} new, {rate:,.0f} rows/min)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
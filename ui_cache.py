@@ -0,0 +1,60 @@
+from collections import OrderedDict
+import pygame
+import pygame.font
+
+# Shared across every widget so fonts are loaded once per size
+_fonts = {}
+_text_cache = OrderedDict()
+MAX_CACHED_TEXTS = 512
+
+def clear_caches():
+    # Fonts and rendered text die with pygame.quit(); using them after a re-init crashes SDL_ttf
+    _fonts.clear()
+    _text_cache.clear()
+
+def get_font(size, name=None):
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not _fonts:
+            # pygame forgets quit hooks once they have run, so register again for each init
+            pygame.register_quit(clear_caches)
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+def render_text(text, size, color, name=None, antialias=True):
+    # Rendered surfaces keyed by (string, font, color); least recently used are dropped
+    key = (text, name, size, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+    surface = get_font(size, name).render(text, antialias, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > MAX_CACHED_TEXTS:
+        _text_cache.popitem(last=False)
+    return surface
+
+class RetainedSurface:
+    # Holds a widget's last rendered surface and rebuilds it only when its inputs change
+    def __init__(self, rle=False):
+        self.key = None
+        self.surface = None
+        self.renders = 0
+        # Run-length encoding makes mostly transparent layers almost free to blit
+        self.rle = rle
+
+    def get(self, key, build):
+        if self.surface is None or key != self.key:
+            surface = build()
+            if self.rle and pygame.display.get_surface() is not None:
+                surface = surface.convert_alpha()
+                surface.set_alpha(255, pygame.RLEACCEL)
+            self.surface = surface
+            self.key = key
+            self.renders += 1
+        return self.surface
+
+    def invalidate(self):
+        self.surface = None